@@ -1,33 +1,186 @@
+import time
+_inicio_imports = time.perf_counter()
 
 import io
+import os
 import sys
+import hashlib
 import math
 import numpy as np
 import pandas as pd
 import streamlit as st
-import seaborn as sns
-import matplotlib.pyplot as plt
 from typing import Optional
 
+# disney_startup.py (LazyModule y perfil de imports compartidos) vive en la raíz
+# del repo; en la imagen de Docker se copia junto a app.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from disney_startup import lazy_import, perfil_imports, registrar_import
+
+registrar_import("numpy + pandas + streamlit", _inicio_imports)
+
 st.set_page_config(page_title="Netflix Data Dashboard", layout="wide")
 
+# ----------------------
+# Arranque: seaborn + matplotlib (~1.7 s) se importan al dibujar el primer gráfico
+# ----------------------
+sns = lazy_import("seaborn")
+plt = lazy_import("matplotlib.pyplot")
+
 # ----------------------
 # Helpers
 # ----------------------
+CATEGORY_COLUMNS = ("type", "country", "rating")
+
+def content_hash(file) -> str:
+    """Hash SHA-1 del contenido subido; se calcula una sola vez por archivo."""
+    hashes = st.session_state.setdefault("_upload_hashes", {})
+    file_key = (file.file_id, file.size)
+    if file_key not in hashes:
+        hashes[file_key] = hashlib.sha1(file.getvalue()).hexdigest()
+    return hashes[file_key]
+
 @st.cache_data(show_spinner=False)
-def load_csv(file) -> pd.DataFrame:
-    return pd.read_csv(file)
+def load_columns(digest: str, _file) -> list:
+    """Solo lee el encabezado para poblar el mapeo de columnas."""
+    return pd.read_csv(io.BytesIO(_file.getvalue()), nrows=0).columns.tolist()
 
 def coerce_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
+    """Agrega `release_year_num` y `duration_num` sobre el mismo frame (sin copiar)."""
     # release_year -> numeric
-    if "release_year" in out.columns:
-        out["release_year_num"] = pd.to_numeric(out["release_year"], errors="coerce")
+    if "release_year" in df.columns:
+        df["release_year_num"] = compact_integer(pd.to_numeric(df["release_year"], errors="coerce"))
     # duration -> numeric (minutes for Movies / seasons for TV Show)
-    if "duration" in out.columns:
-        extracted = out["duration"].astype(str).str.extract(r"(\d+)")[0]
-        out["duration_num"] = pd.to_numeric(extracted, errors="coerce")
-    return out
+    if "duration" in df.columns:
+        # Parsear solo los valores distintos y mapear por código de categoría
+        duration = df["duration"].astype("category")
+        parsed = duration.cat.categories.astype(str).str.extract(r"(\d+)")[0]
+        lookup = pd.to_numeric(parsed, errors="coerce").to_numpy(dtype="float64")
+        codes = duration.cat.codes.to_numpy()
+        values = np.where(codes >= 0, lookup[codes] if len(lookup) else np.nan, np.nan)
+        df["duration_num"] = compact_integer(pd.Series(values, index=df.index))
+    return df
+
+def compact_integer(s: pd.Series) -> pd.Series:
+    """Reduce una serie numérica al entero más pequeño posible (nullable si hay NaN)."""
+    valid = s.dropna()
+    if valid.empty or not np.all(np.mod(valid, 1) == 0):
+        return s
+    if valid.size == s.size:
+        return pd.to_numeric(s.astype("int64"), downcast="integer")
+    for dtype in ("Int8", "Int16", "Int32"):
+        info = np.iinfo(dtype.lower())
+        if valid.min() >= info.min and valid.max() <= info.max:
+            return s.astype(dtype)
+    return s.astype("Int64")
+
+@st.cache_resource(show_spinner="Procesando CSV...", max_entries=4)
+def ingest_csv(digest: str, release_col: Optional[str], duration_col: Optional[str], type_col: Optional[str], _file) -> pd.DataFrame:
+    """
+    Lee, mapea y tipa el CSV una sola vez por (hash de contenido, mapeo).
+    Se guarda como recurso compartido: los reruns reciben el mismo objeto, sin copias.
+    """
+    df = pd.read_csv(io.BytesIO(_file.getvalue()))
+    # If user mapped different names, align to canonical ones (referencias, sin copias)
+    for source, canonical in ((release_col, "release_year"), (duration_col, "duration"), (type_col, "type")):
+        if source and source != canonical:
+            df[canonical] = df[source]
+    df = coerce_numeric_columns(df)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in df.select_dtypes(include="integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def filter_by_type(digest: str, mapping: tuple, content_type: str, _df: pd.DataFrame) -> pd.DataFrame:
+    if content_type in ("Movie", "TV Show") and "type" in _df.columns:
+        return _df[_df["type"] == content_type]
+    return _df
+
+# ----------------------
+# Modo densidad: agregar con NumPy sobre todas las filas y luego graficar
+# ----------------------
+@st.cache_data(show_spinner=False)
+def density_grid(_df: pd.DataFrame, cols: tuple, data_key: tuple, bins: int = 40) -> dict:
+    """
+    Calcula histogramas 1D (diagonal) y 2D (pares) para las columnas dadas.
+    `data_key` identifica el dataset + filtro; `_df` no se hashea.
+    """
+    values = _df[list(cols)].dropna().to_numpy(dtype="float64")
+    if len(values) == 0:
+        return {"rows": 0}
+    edges = []
+    for i in range(len(cols)):
+        lo, hi = values[:, i].min(), values[:, i].max()
+        if lo == hi:
+            lo, hi = lo - 0.5, hi + 0.5
+        edges.append(np.linspace(lo, hi, bins + 1))
+    diag = [np.histogram(values[:, i], bins=edges[i])[0] for i in range(len(cols))]
+    pairs = {}
+    for i in range(len(cols)):
+        for j in range(i + 1, len(cols)):
+            # Un solo histograma por par; el espejo (j, i) es su transpuesta
+            pairs[(i, j)] = np.histogram2d(values[:, j], values[:, i], bins=(edges[j], edges[i]))[0]
+            pairs[(j, i)] = pairs[(i, j)].T
+    return {"edges": edges, "diag": diag, "pairs": pairs, "rows": len(values)}
+
+@st.cache_data(show_spinner=False)
+def binned_regression(_df: pd.DataFrame, xcol: str, ycol: str, data_key: tuple, bins: int = 60) -> dict:
+    """
+    Resumen binned de y vs x: conteo, media y percentiles 25/75 por bin,
+    más la recta de mínimos cuadrados calculada sobre todas las filas.
+    """
+    xy = _df[[xcol, ycol]].dropna().to_numpy(dtype="float64")
+    x, y = xy[:, 0], xy[:, 1]
+    if len(x) == 0:
+        return {"rows": 0}
+    lo, hi = x.min(), x.max()
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    edges = np.linspace(lo, hi, bins + 1)
+    idx = np.clip(np.digitize(x, edges) - 1, 0, bins - 1)
+    counts = np.bincount(idx, minlength=bins)
+    sums = np.bincount(idx, weights=y, minlength=bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    order = np.lexsort((y, idx))
+    y_sorted, idx_sorted = y[order], idx[order]
+    starts = np.searchsorted(idx_sorted, np.arange(bins), side="left")
+    q25 = np.full(bins, np.nan)
+    q75 = np.full(bins, np.nan)
+    for b in np.nonzero(counts)[0]:
+        chunk = y_sorted[starts[b]:starts[b] + counts[b]]
+        q25[b], q75[b] = np.percentile(chunk, [25, 75])
+    slope, intercept = np.polyfit(x, y, 1) if len(np.unique(x)) > 1 else (0.0, float(y.mean()))
+    return {
+        "centers": (edges[:-1] + edges[1:]) / 2,
+        "counts": counts,
+        "means": means,
+        "q25": q25,
+        "q75": q75,
+        "fit": (float(slope), float(intercept)),
+        "rows": len(x),
+    }
+
+def plot_density_grid(grid: dict, cols: tuple):
+    n = len(cols)
+    fig, axes = plt.subplots(n, n, figsize=(2.6 * n, 2.6 * n), squeeze=False)
+    for i in range(n):
+        for j in range(n):
+            ax = axes[i][j]
+            if i == j:
+                edges = grid["edges"][i]
+                ax.bar(edges[:-1], grid["diag"][i], width=np.diff(edges), align="edge")
+            else:
+                counts = grid["pairs"][(i, j)]
+                ax.pcolormesh(grid["edges"][j], grid["edges"][i], np.log1p(counts).T, cmap="viridis")
+            if i == n - 1:
+                ax.set_xlabel(cols[j])
+            if j == 0:
+                ax.set_ylabel(cols[i])
+    fig.tight_layout()
+    return fig
 
 def count_by_year(df: pd.DataFrame, content_type: Optional[str] = None) -> pd.Series:
     q = df
@@ -49,10 +202,20 @@ Si tu CSV tiene columnas diferentes, ajusta las opciones de columnas más abajo.
 """
 st.sidebar.info(sample_notice, icon="ℹ️")
 
+render_mode = st.sidebar.radio(
+    "Modo de gráficos",
+    ["Densidad (todas las filas)", "Puntos (muestra)"],
+    index=0,
+    help="Densidad agrega con NumPy sobre todo el dataset; Puntos dibuja cada fila con seaborn.",
+)
+density_mode = render_mode.startswith("Densidad")
 pairplot_rows = st.sidebar.slider("Límite de filas para Pairplot (muestra aleatoria)", 200, 5000, 1000, step=100)
 show_reg = st.sidebar.checkbox("Agregar línea de regresión en scatter (regplot)", value=False)
 content_filter = st.sidebar.selectbox("Filtrar por tipo", ["Todos", "Movie", "TV Show"])
 
+with st.sidebar.expander("⏱️ Perfil de arranque"):
+    st.dataframe(perfil_imports(), hide_index=True)
+
 # ----------------------
 # Main
 # ----------------------
@@ -63,36 +226,33 @@ if uploaded is None:
     st.stop()
 
 try:
-    data = load_csv(uploaded)
+    digest = content_hash(uploaded)
+    columns = load_columns(digest, uploaded)
 except Exception as e:
     st.error(f"No se pudo leer el CSV: {e}")
     st.stop()
 
 # Column mapping helpers (in case user CSV differs slightly)
-default_release_col = "release_year" if "release_year" in data.columns else None
-default_duration_col = "duration" if "duration" in data.columns else None
-default_type_col = "type" if "type" in data.columns else None
+default_release_col = "release_year" if "release_year" in columns else None
+default_duration_col = "duration" if "duration" in columns else None
+default_type_col = "type" if "type" in columns else None
 
 with st.expander("⚙️ Mapear columnas (opcional)", expanded=False):
-    release_col = st.selectbox("Columna de año de estreno", [None] + list(data.columns), index=(list(data.columns).index(default_release_col)+1 if default_release_col in data.columns else 0))
-    duration_col = st.selectbox("Columna de duración", [None] + list(data.columns), index=(list(data.columns).index(default_duration_col)+1 if default_duration_col in data.columns else 0))
-    type_col = st.selectbox("Columna de tipo (Movie / TV Show)", [None] + list(data.columns), index=(list(data.columns).index(default_type_col)+1 if default_type_col in data.columns else 0))
+    release_col = st.selectbox("Columna de año de estreno", [None] + columns, index=(columns.index(default_release_col)+1 if default_release_col in columns else 0))
+    duration_col = st.selectbox("Columna de duración", [None] + columns, index=(columns.index(default_duration_col)+1 if default_duration_col in columns else 0))
+    type_col = st.selectbox("Columna de tipo (Movie / TV Show)", [None] + columns, index=(columns.index(default_type_col)+1 if default_type_col in columns else 0))
 
-# If user mapped different names, align to canonical ones
-data = data.copy()
-if release_col and release_col != "release_year":
-    data["release_year"] = data[release_col]
-if duration_col and duration_col != "duration":
-    data["duration"] = data[duration_col]
-if type_col and type_col != "type":
-    data["type"] = data[type_col]
+mapping = (release_col, duration_col, type_col)
+try:
+    df = ingest_csv(digest, *mapping, uploaded)
+except Exception as e:
+    st.error(f"No se pudo leer el CSV: {e}")
+    st.stop()
 
-df = coerce_numeric_columns(data)
+df_view = filter_by_type(digest, mapping, content_filter, df)
 
-if content_filter in ("Movie", "TV Show") and "type" in df.columns:
-    df_view = df[df["type"] == content_filter]
-else:
-    df_view = df
+# Llave del dataset para los caches de agregados (contenido + mapeo + filtro)
+data_key = (digest, mapping, content_filter)
 
 # ----------------------
 # KPIs
@@ -151,6 +311,13 @@ with tab2:
         sel = st.multiselect("Selecciona columnas numéricas", numeric_cols, default=numeric_cols[:min(4,len(numeric_cols))])
         if len(sel) < 2:
             st.info("Selecciona al menos dos columnas.")
+        elif density_mode:
+            grid = density_grid(df_view, tuple(sel), data_key)
+            if grid["rows"] == 0:
+                st.info("No hay filas completas para las columnas seleccionadas.")
+            else:
+                st.caption(f"Densidad 2D sobre {grid['rows']:,} filas (escala log).")
+                st.pyplot(plot_density_grid(grid, tuple(sel)), clear_figure=True)
         else:
             # Sample to keep it lightweight
             plot_df = df_view[sel].dropna()
@@ -187,17 +354,34 @@ with tab4:
             st.info("No hay columnas numéricas para comparar.")
         else:
             ycol = st.selectbox("Variable numérica (Y)", numeric_cols, index=0)
-            plot_df = df_view[["release_year_num", ycol]].dropna()
-            if plot_df.empty:
-                st.info("No hay datos suficientes para graficar.")
+            if density_mode:
+                summary = binned_regression(df_view, "release_year_num", ycol, data_key)
+                if summary["rows"] == 0:
+                    st.info("No hay datos suficientes para graficar.")
+                else:
+                    fig, ax = plt.subplots(figsize=(10, 4))
+                    ax.fill_between(summary["centers"], summary["q25"], summary["q75"], alpha=0.3, label="P25–P75")
+                    ax.plot(summary["centers"], summary["means"], marker="o", ms=3, label="Media por bin")
+                    if show_reg:
+                        slope, intercept = summary["fit"]
+                        ax.plot(summary["centers"], slope * summary["centers"] + intercept, color="C3", label="Regresión lineal")
+                    ax.set_xlabel("Año de estreno")
+                    ax.set_ylabel(ycol)
+                    ax.legend()
+                    st.caption(f"Resumen binned sobre {summary['rows']:,} filas.")
+                    st.pyplot(fig, clear_figure=True)
             else:
-                fig, ax = plt.subplots(figsize=(10, 4))
-                if show_reg:
-                    sns.regplot(x="release_year_num", y=ycol, data=plot_df, ax=ax, scatter_kws=dict(s=20, alpha=0.6))
+                plot_df = df_view[["release_year_num", ycol]].dropna()
+                if plot_df.empty:
+                    st.info("No hay datos suficientes para graficar.")
                 else:
-                    sns.scatterplot(x="release_year_num", y=ycol, data=plot_df, ax=ax, s=20)
-                ax.set_xlabel("Año de estreno")
-                ax.set_ylabel(ycol)
-                st.pyplot(fig, clear_figure=True)
+                    fig, ax = plt.subplots(figsize=(10, 4))
+                    if show_reg:
+                        sns.regplot(x="release_year_num", y=ycol, data=plot_df, ax=ax, scatter_kws=dict(s=20, alpha=0.6))
+                    else:
+                        sns.scatterplot(x="release_year_num", y=ycol, data=plot_df, ax=ax, s=20)
+                    ax.set_xlabel("Año de estreno")
+                    ax.set_ylabel(ycol)
+                    st.pyplot(fig, clear_figure=True)
 
 st.caption("Hecho con Streamlit • Seaborn • Matplotlib • Pandas")
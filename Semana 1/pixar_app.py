@@ -1,31 +1,87 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-import requests
+
+from pixar_loader import ThumbnailCache, fetch_all_characters
 
 # Configuración de la página
 st.set_page_config(page_title="Pixar Dashboard", layout="wide")
 
+SIN_SERIES = "Ninguna"
+
 # 
 # 1. Cargar datos de la API
 # 
-@st.cache_data
+@st.cache_data(ttl=3600)
 def load_data():
     personajes = []
-    for page in range(1, 6):  # puedes aumentar este número si quieres más datos
-        url = f"https://api.disneyapi.dev/character?page={page}"
-        r = requests.get(url).json()
-        for p in r["data"]:
-            if p["films"]:  # solo personajes con películas
-                personajes.append({
-                    "Nombre": p["name"],
-                    "Películas": ", ".join(p["films"]),
-                    "Series": ", ".join(p["tvShows"]) if p["tvShows"] else "Ninguna",
-                    "Imagen": p["imageUrl"]
-                })
-    return pd.DataFrame(personajes)
-
-df = load_data()
+    for p in fetch_all_characters():  # todas las páginas, en paralelo
+        if p.get("films"):  # solo personajes con películas
+            personajes.append({
+                "Nombre": p["name"],
+                "films": p["films"],
+                "tvShows": p.get("tvShows") or [SIN_SERIES],
+                "Imagen": p.get("imageUrl")
+            })
+    return personajes
+
+@st.cache_resource
+def get_thumbnails():
+    return ThumbnailCache()
+
+def build_relation(listas):
+    """
+    Explota listas por personaje en una tabla personaje↔título con códigos enteros.
+    Devuelve (títulos ordenados, array de personaje por arista, array de título por arista).
+    """
+    char_ids = np.repeat(np.arange(len(listas)), [len(l) for l in listas])
+    flat = pd.Series([t for l in listas for t in l], dtype="object")
+    codes, titulos = pd.factorize(flat, sort=True)
+    return titulos.to_numpy(), char_ids.astype(np.int32), codes.astype(np.int32)
+
+@st.cache_resource
+def load_index():
+    """
+    Índice invertido: tabla de personajes + relaciones personaje↔película y
+    personaje↔serie como arrays de códigos, construido una sola vez.
+    """
+    personajes = load_data()
+    films, film_char, film_code = build_relation([p["films"] for p in personajes])
+    series, serie_char, serie_code = build_relation([p["tvShows"] for p in personajes])
+    characters = pd.DataFrame({
+        "Nombre": [p["Nombre"] for p in personajes],
+        "Películas": [", ".join(p["films"]) for p in personajes],
+        "Series": [", ".join(p["tvShows"]) for p in personajes],
+        "Imagen": [p["Imagen"] for p in personajes],
+    })
+    return {
+        "characters": characters,
+        "films": films,
+        "film_char": film_char,
+        "film_code": film_code,
+        "series": series,
+        "serie_char": serie_char,
+        "serie_code": serie_code,
+    }
+
+def match_characters(n_chars, titulos, char_ids, codes, seleccion):
+    """Máscara booleana de personajes con al menos un título seleccionado (coincidencia exacta)."""
+    selected = np.zeros(len(titulos), dtype=bool)
+    seleccion = np.asarray(seleccion, dtype=object)
+    idx = np.minimum(np.searchsorted(titulos, seleccion), max(len(titulos) - 1, 0))
+    # Un título ausente del índice no debe marcar a su vecino en el orden
+    found = titulos[idx] == seleccion if len(titulos) else np.zeros(len(seleccion), dtype=bool)
+    selected[idx[found]] = True
+    return np.bincount(char_ids[selected[codes]], minlength=n_chars) > 0
+
+def count_titles(mask, titulos, char_ids, codes):
+    """Personajes por título considerando solo los personajes de la máscara."""
+    counts = np.bincount(codes[mask[char_ids]], minlength=len(titulos))
+    return pd.Series(counts, index=titulos)
+
+index = load_index()
+df = index["characters"]
 
 # 
 # 2. Título
@@ -37,24 +93,28 @@ st.title("🎬 Pixar Dashboard (Disney API)")
 # 
 st.sidebar.header("Filtros")
 
-lista_peliculas = sorted(set(", ".join(df["Películas"]).split(", ")))
-lista_series = sorted(set(", ".join(df["Series"]).split(", ")))
+lista_peliculas = list(index["films"])
+lista_series = list(index["series"])
 
 peliculas_sel = st.sidebar.multiselect("Películas", options=lista_peliculas, default=lista_peliculas)
 series_sel = st.sidebar.multiselect("Series", options=lista_series, default=lista_series)
 
-filtro = df[
-    df["Películas"].apply(lambda x: any(p in x for p in peliculas_sel)) &
-    df["Series"].apply(lambda x: any(s in x for s in series_sel))
-]
+mask = (
+    match_characters(len(df), index["films"], index["film_char"], index["film_code"], peliculas_sel) &
+    match_characters(len(df), index["series"], index["serie_char"], index["serie_code"], series_sel)
+)
+filtro = df[mask]
+
+film_counts = count_titles(mask, index["films"], index["film_char"], index["film_code"])
+show_counts = count_titles(mask, index["series"], index["serie_char"], index["serie_code"])
 
 # 
 # 4. KPIs
 # 
 col1, col2, col3 = st.columns(3)
 col1.metric("Total de personajes", len(filtro))
-col2.metric("Películas únicas", len(set(", ".join(filtro["Películas"]).split(", "))))
-col3.metric("Series únicas", len(set(", ".join(filtro["Series"]).split(", "))) if len(filtro) > 0 else 0)
+col2.metric("Películas únicas", int((film_counts > 0).sum()))
+col3.metric("Series únicas", int((show_counts > 0).sum()))
 
 # 
 # 5. Gráficos
@@ -63,7 +123,7 @@ col1, col2 = st.columns(2)
 
 # 📊 Gráfico de personajes por película
 with col1:
-    film_counts = filtro["Películas"].str.split(", ").explode().value_counts().reset_index()
+    film_counts = film_counts[film_counts > 0].sort_values(ascending=False).reset_index()
     film_counts.columns = ["Película", "Personajes"]
     fig1 = px.bar(film_counts, x="Película", y="Personajes", title="Personajes por película")
     fig1.update_layout(xaxis={'categoryorder':'total descending'})
@@ -71,7 +131,7 @@ with col1:
 
 # 🥧 Gráfico circular por series
 with col2:
-    show_counts = filtro["Series"].str.split(", ").explode().value_counts().reset_index()
+    show_counts = show_counts[show_counts > 0].sort_values(ascending=False).reset_index()
     show_counts.columns = ["Serie", "Personajes"]
     fig2 = px.pie(show_counts, names="Serie", values="Personajes", title="Distribución por series")
     st.plotly_chart(fig2, use_container_width=True)
@@ -87,6 +147,8 @@ st.dataframe(filtro[["Nombre", "Películas", "Series"]].head(20), use_container_
 # 
 st.subheader("✨ Personajes destacados")
 cols = st.columns(4)
-for i, row in enumerate(filtro.head(4).itertuples()):
+destacados = filtro.head(4)
+thumbs = get_thumbnails().prefetch(destacados["Imagen"].tolist())
+for i, (row, thumb) in enumerate(zip(destacados.itertuples(), thumbs)):
     with cols[i]:
-        st.image(row.Imagen, caption=row.Nombre, use_container_width=True)
+        st.image(thumb or row.Imagen, caption=row.Nombre, use_container_width=True)
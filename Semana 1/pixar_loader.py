@@ -0,0 +1,128 @@
+"""
+Carga concurrente de la Disney API y cache local de miniaturas para pixar_app.py.
+
+Las URLs y el directorio de cache se pueden cambiar por variables de entorno
+(DISNEY_API_URL, PIXAR_THUMB_DIR) para probar contra una API e imágenes locales.
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.getenv("DISNEY_API_URL", "https://api.disneyapi.dev/character")
+THUMB_DIR = os.getenv("PIXAR_THUMB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".thumbs"))
+TIMEOUT = 10
+
+
+def make_session(pool_size: int = 16) -> requests.Session:
+    """Sesión HTTP con pool de conexiones y reintentos para errores transitorios."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_page(session: requests.Session, page: int, url: str = API_URL) -> dict:
+    r = session.get(url, params={"page": page}, timeout=TIMEOUT)
+    r.raise_for_status()
+    return r.json()
+
+
+def fetch_all_characters(session: Optional[requests.Session] = None, url: str = API_URL,
+                         max_pages: Optional[int] = None, max_workers: int = 8) -> list:
+    """
+    Descarga todas las páginas de personajes. La primera página indica
+    `info.totalPages`; el resto se pide en paralelo y se concatena en orden.
+    """
+    session = session or make_session(max_workers)
+    first = fetch_page(session, 1, url)
+    total_pages = int(first.get("info", {}).get("totalPages") or 1)
+    if max_pages:
+        total_pages = min(total_pages, max_pages)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        rest = list(pool.map(lambda page: fetch_page(session, page, url), range(2, total_pages + 1)))
+
+    characters = []
+    for payload in [first] + rest:
+        data = payload.get("data", [])
+        # Con un solo resultado la API devuelve un objeto en lugar de una lista
+        characters.extend(data if isinstance(data, list) else [data])
+    return characters
+
+
+class ThumbnailCache:
+    """
+    Cache en disco de miniaturas: cada imagen se descarga una sola vez, se reduce
+    a `size` y se guarda como JPEG. Cuando el directorio supera `max_bytes` se
+    eliminan las miniaturas usadas hace más tiempo (por mtime).
+    """
+
+    def __init__(self, directory: str = THUMB_DIR, size: tuple = (256, 256),
+                 max_bytes: int = 50 * 1024 * 1024, session: Optional[requests.Session] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.max_bytes = max_bytes
+        self.session = session or make_session()
+        self._lock = threading.Lock()
+
+    def path_for(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.jpg"
+
+    def get(self, url: Optional[str]) -> Optional[str]:
+        """Ruta local de la miniatura de `url`, o None si no se pudo descargar."""
+        if not url:
+            return None
+        path = self.path_for(url)
+        # Comprobar y tocar bajo el lock: evict() no puede borrarla entre las dos cosas
+        with self._lock:
+            try:
+                os.utime(path)
+                return str(path)
+            except FileNotFoundError:
+                pass
+        try:
+            r = self.session.get(url, timeout=TIMEOUT)
+            r.raise_for_status()
+            image = Image.open(io.BytesIO(r.content)).convert("RGB")
+        except Exception:
+            return None
+        image.thumbnail(self.size)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        image.save(tmp, format="JPEG", quality=85)
+        os.replace(tmp, path)
+        self.evict(keep=path)
+        return str(path)
+
+    def prefetch(self, urls, max_workers: int = 8) -> list:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(self.get, urls))
+
+    def evict(self, keep: Optional[Path] = None):
+        """Borra las miniaturas más viejas hasta bajar de `max_bytes`, sin tocar `keep`."""
+        with self._lock:
+            files = []
+            for p in self.directory.glob("*.jpg"):
+                try:
+                    files.append((p, p.stat()))
+                except FileNotFoundError:
+                    continue
+            total = sum(stat.st_size for _, stat in files)
+            for p, stat in sorted(files, key=lambda item: item[1].st_mtime):
+                if total <= self.max_bytes:
+                    break
+                if p == keep:
+                    continue
+                p.unlink(missing_ok=True)
+                total -= stat.st_size
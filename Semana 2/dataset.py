@@ -1,4 +1,5 @@
 import boto3
+import numpy as np
 import pandas as pd
 import json
 import streamlit as st
@@ -40,47 +41,86 @@ def actualizar() -> pd.DataFrame:
     else:
         return pd.DataFrame()
 
-def contar_status(df: pd.DataFrame) -> pd.DataFrame:
+@st.cache_resource(show_spinner=False)
+def construir_store() -> dict:
+    """
+    Store en memoria ordenado por tiempo:
+    - `df`: registros con `timestamp` datetime64 y server_id/region/status categóricos.
+    - `ts`: array de timestamps ordenado, para cortar rangos con búsqueda binaria.
+    - `buckets`: conteos pre-agregados por día × región × servidor × status.
+    """
+    raw = actualizar()
+    if raw.empty:
+        return {}
+    df = raw.drop(columns=["fecha"]).sort_values("timestamp", kind="stable").reset_index(drop=True)
+    if df["timestamp"].dt.tz is not None:
+        # Misma fecha "de pared" que usaba `.dt.date`, sin zona horaria
+        df["timestamp"] = df["timestamp"].dt.tz_localize(None)
+    for col in ("server_id", "region", "status"):
+        df[col] = df[col].astype("category")
+    df["dia"] = df["timestamp"].dt.floor("D")
+
+    buckets = (
+        df.groupby(["dia", "region", "server_id", "status"], observed=True)
+        .size()
+        .rename("count")
+        .reset_index()
+    )
+    return {
+        "df": df,
+        "ts": df["timestamp"].to_numpy(),
+        "buckets": buckets,
+        "dias": buckets["dia"].to_numpy(),
+    }
+
+def rango(valores: np.ndarray, inicio, fin) -> slice:
+    """Posiciones [inicio, fin] (fechas inclusivas) en un array datetime64 ordenado."""
+    lo = np.searchsorted(valores, np.datetime64(inicio, "ns"), side="left")
+    hi = np.searchsorted(valores, np.datetime64(fin, "ns") + np.timedelta64(1, "D"), side="left")
+    return slice(lo, hi)
+
+def contar_status(buckets: pd.DataFrame) -> pd.DataFrame:
     """
     Devuelve un DataFrame con conteo de OK, WARN y ERROR por servidor.
     """
-    return df.groupby(['server_id', 'status']).size().unstack(fill_value=0)
-
-# ----------------------
-# Sidebar
-# ----------------------
-st.sidebar.title("🎛️ Controles")
-fecha_inicio = st.sidebar.date_input("Fecha inicio")
-fecha_fin = st.sidebar.date_input("Fecha fin")
-region_filter = st.sidebar.multiselect("Filtrar por región", options=[], default=[])
+    return buckets.groupby(['server_id', 'status'], observed=True)['count'].sum().unstack(fill_value=0)
 
 # ----------------------
 # Main
 # ----------------------
 st.title("🖥️ Server Status Dashboard")
 
-df = actualizar()
-if df.empty:
+store = construir_store()
+if not store:
     st.warning("No hay datos disponibles en S3.")
     st.stop()
 
-# Filtros dinámicos
-region_options = sorted(df['region'].unique())
+# ----------------------
+# Sidebar
+# ----------------------
+st.sidebar.title("🎛️ Controles")
+fecha_inicio = st.sidebar.date_input("Fecha inicio")
+fecha_fin = st.sidebar.date_input("Fecha fin")
+region_options = list(store["df"]["region"].cat.categories)
+region_filter = st.sidebar.multiselect("Filtrar por región", options=region_options, default=[])
 if not region_filter:
     region_filter = region_options
-df = df[df['region'].isin(region_filter)]
-df = df[(df['fecha'] >= fecha_inicio) & (df['fecha'] <= fecha_fin)]
+
+# Filtros dinámicos: el rango de fechas se corta por búsqueda binaria y la región
+# solo se evalúa sobre la ventana seleccionada.
+buckets = store["buckets"].iloc[rango(store["dias"], fecha_inicio, fecha_fin)]
+buckets = buckets[buckets['region'].isin(region_filter)]
 
 # ----------------------
 # KPIs
 # ----------------------
 left, mid, right = st.columns(3)
 with left:
-    st.metric("Total registros", f"{len(df):,}")
+    st.metric("Total registros", f"{int(buckets['count'].sum()):,}")
 with mid:
-    st.metric("Servidores únicos", df['server_id'].nunique())
+    st.metric("Servidores únicos", buckets['server_id'].nunique())
 with right:
-    st.metric("Regiones", len(df['region'].unique()))
+    st.metric("Regiones", buckets['region'].nunique())
 
 st.markdown("---")
 
@@ -91,7 +131,7 @@ tab1, tab2, tab3 = st.tabs(["📊 Conteo por servidor", "📈 Tendencias por fec
 
 with tab1:
     st.subheader("Conteo de status por servidor")
-    conteo = contar_status(df)
+    conteo = contar_status(buckets)
     st.dataframe(conteo)
 
     # Gráfico de barras apiladas
@@ -103,5 +143,5 @@ with tab1:
 
 with tab2:
     st.subheader("Tendencia de status por fecha")
-    tendencia = df.groupby(['fecha', 'status']).size().unstack()
-
+    tendencia = buckets.groupby(['dia', 'status'], observed=True)['count'].sum().unstack(fill_value=0)
+    st.line_chart(tendencia)
@@ -0,0 +1,117 @@
+"""
+Benchmark de los backends de disney_queries (pandas vs DuckDB).
+
+Genera películas sintéticas con el esquema de movies_enriched en Parquet y
+mide el conjunto de consultas que hace el dashboard en un rerun con filtros.
+
+Uso:
+    python benchmark_backends.py --rows 100000 10000000 100000000
+
+Por defecto pandas solo corre hasta --pandas-max-rows (cargar 100M filas en
+memoria necesita decenas de GB); DuckDB corre en todos los tamaños.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from disney_processing import synthetic_chunk
+from disney_queries import DuckDBBackend, PandasBackend
+
+CHUNK_ROWS = 5_000_000
+
+
+def write_dataset(path: str, rows: int, seed: int = 42):
+    # Se reutiliza solo si coincide con el esquema y tamaño actuales del generador;
+    # datos de corridas anteriores con otras columnas o tipos se regeneran
+    rng = np.random.default_rng(seed)
+    if os.path.exists(path):
+        meta = pq.read_metadata(path)
+        esquema = synthetic_chunk(1, 0, np.random.default_rng(seed)).schema
+        if meta.num_rows == rows and meta.schema.to_arrow_schema().equals(esquema):
+            return
+    writer = None
+    for offset in range(0, rows, CHUNK_ROWS):
+        table = synthetic_chunk(min(CHUNK_ROWS, rows - offset), offset, rng)
+        writer = writer or pq.ParquetWriter(path, table.schema, compression="snappy")
+        writer.write_table(table)
+    writer.close()
+
+
+def dashboard_rerun(backend):
+    """Las consultas de un rerun del dashboard con filtro de años y marca."""
+    filtros = (("release_year", "between", (1990, 2010)), ("brand", "=", "Pixar"))
+    backend.distinct("brand", filtros[:1])
+    backend.distinct("segment", filtros)
+    backend.count(filtros)
+    backend.aggregate(filtros, None, {"revenue": ("box_office_revenue_clean", "sum"),
+                                      "rating": ("imdb_score", "mean"),
+                                      "chars": ("character_count", "sum")})
+    backend.aggregate(filtros, "brand", {"revenue": ("box_office_revenue_clean", "sum")})
+    backend.aggregate(filtros, "rating_category", {"n": (None, "count")})
+    backend.aggregate(filtros, "segment", {"n": (None, "count")})
+    backend.aggregate(filtros, "release_year", {"revenue": ("box_office_revenue_clean", "sum")})
+    backend.aggregate(filtros, "release_year", {"n": (None, "count")})
+    backend.aggregate(filtros, "decade", {"n": (None, "count"),
+                                          "revenue": ("box_office_revenue_clean", "mean"),
+                                          "chars": ("character_count", "mean")})
+    backend.top_n(filtros, "box_office_revenue_clean", 10, ["film_title", "box_office_revenue_clean", "release_year"])
+    backend.top_n(filtros, "imdb_score", 10, ["film_title", "imdb_score", "release_year"])
+    backend.top_n(filtros, "character_count", 20, ["film_title", "release_year", "character_count"])
+    backend.corr(filtros, "imdb_score", "box_office_revenue_clean")
+    backend.corr(filtros, "character_count", "box_office_revenue_clean")
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 10_000_000, 100_000_000])
+    parser.add_argument("--data-dir", default="bench_data")
+    parser.add_argument("--pandas-max-rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    print(f"{'filas':>12} | {'backend':>7} | {'carga (s)':>9} | {'rerun (s)':>9}")
+    print("-" * 48)
+    for rows in args.rows:
+        path = os.path.join(args.data_dir, f"movies_{rows}.parquet")
+        write_dataset(path, rows)
+
+        start = time.perf_counter()
+        duck = DuckDBBackend(path)
+        load = time.perf_counter() - start
+        # Sin tablas filtradas previas, como en el primer rerun tras cambiar un filtro
+        def duckdb_rerun():
+            duck.reset_cache()
+            dashboard_rerun(duck)
+        print(f"{rows:>12,} | {'duckdb':>7} | {load:>9.3f} | {timed(duckdb_rerun, args.repeat):>9.3f}")
+
+        if rows > args.pandas_max_rows:
+            print(f"{rows:>12,} | {'pandas':>7} | {'omitido (--pandas-max-rows)':>21}")
+            continue
+        start = time.perf_counter()
+        movies = pd.read_parquet(path)
+        pandas_backend = PandasBackend(movies)
+        load = time.perf_counter() - start
+        # Sin la cache de filtro, como en el primer rerun tras cambiar un filtro
+        def pandas_rerun():
+            pandas_backend._cache = ((), movies)
+            dashboard_rerun(pandas_backend)
+        print(f"{rows:>12,} | {'pandas':>7} | {load:>9.3f} | {timed(pandas_rerun, args.repeat):>9.3f}")
+        del movies, pandas_backend
+
+
+if __name__ == "__main__":
+    main()
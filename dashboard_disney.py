@@ -1,11 +1,24 @@
+import time
+_inicio_imports = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import boto3
 import json
+import os
 from datetime import datetime
 
+from disney_character_index import INDEX_PATH as CHARACTER_INDEX_PATH, CharacterIndex
+from disney_figures import cached_figure, downsample_line
+from disney_queries import PARQUET_PATH, DuckDBBackend, PandasBackend, parquet_mtime
+from disney_schema import SCHEMAS, aplicar_esquema, reporte_memoria, tipo_spark
+from disney_startup import SnapshotSource, imprimir_perfil, lazy_import, perfil_imports, registrar_import
+
+registrar_import("streamlit + pandas + módulos locales", _inicio_imports)
+
+# plotly y boto3 se importan al primer gráfico / primera llamada a AWS
+px = lazy_import("plotly.express")
+boto3 = lazy_import("boto3")
+
 # ==================== CONFIGURACIÓN ====================
 st.set_page_config(
     page_title="Disney Movies Analytics",
@@ -36,48 +49,61 @@ def get_lambda_stats():
         st.warning(f"No se pudo invocar Lambda: {str(e)}")
         return None
 
-@st.cache_data(ttl=300)
-def load_data_from_s3():
-    """Carga datos desde S3"""
-    try:
-        s3 = boto3.client('s3')
-        bucket = 'xideralaws-curso-fernanda'
-        
-        # Leer CSVs
-        files = {
-            'movies': 'disney-project/final/movies_spark.csv',
-            'segment': 'disney-project/final/agg_segment.csv',
-            'temporal': 'disney-project/final/agg_temporal.csv',
-            'decade': 'disney-project/final/agg_decade.csv'
-        }
-        
-        data = {}
-        for key, file_path in files.items():
-            try:
-                obj = s3.get_object(Bucket=bucket, Key=file_path)
-                data[key] = pd.read_csv(obj['Body'])
-            except Exception as e:
-                st.warning(f"No se pudo cargar {key}: {file_path}")
-                data[key] = pd.DataFrame()  # DataFrame vacío como fallback
-        
-        return data
-    except Exception as e:
-        st.error(f"Error cargando datos: {str(e)}")
-        return None
+def fetch_movies_from_s3():
+    """Lee movies_spark.csv de S3. Corre en un hilo de fondo: sin llamadas a st.*"""
+    s3 = boto3.client('s3')
+    obj = s3.get_object(Bucket='xideralaws-curso-fernanda', Key='disney-project/final/movies_spark.csv')
+    return pd.read_csv(obj['Body'])
 
-def get_col(df, possible_names):
-    """Busca una columna por varios nombres posibles"""
-    for name in possible_names:
-        if name in df.columns:
-            return name
+def movies_backend(df):
+    """Backend pandas sobre la tabla con nombres canónicos y tipos compactos (también para snapshots viejos)."""
+    return PandasBackend(aplicar_esquema(df, "movies_enriched", completar=True))
+
+@st.cache_resource(ttl=300)
+def get_s3_source():
+    """
+    Datos de S3 detrás de un snapshot local: el primer render usa el último
+    dataset conocido y el refresco desde S3 corre en segundo plano.
+    """
+    return SnapshotSource(fetch_movies_from_s3, movies_backend)
+
+def _close_backend(backend):
+    if backend is not None:
+        backend.close()
+
+@st.cache_resource(max_entries=1, on_release=_close_backend)
+def get_backend(preferred, mtime):
+    """
+    DuckDB sobre los Parquet de Spark si están disponibles; None para usar S3.
+    `mtime` invalida la cache: al reescribirse el Parquet se crea un backend
+    nuevo y el anterior borra sus tablas filtradas.
+    """
+    if preferred == "duckdb" and os.path.exists(PARQUET_PATH):
+        try:
+            # Mismas columnas canónicas que el camino pandas (aplicar_esquema con completar=True)
+            canonicas = {col: tipo_spark(spec) for col, spec in SCHEMAS["movies_enriched"].items()}
+            return DuckDBBackend(PARQUET_PATH, canonicas)
+        except ImportError:
+            pass
     return None
 
+@st.cache_resource
+def get_character_index(mtime):
+    """Índice de búsqueda de personajes generado por el pipeline (mmap); `mtime` invalida la cache."""
+    return CharacterIndex(CHARACTER_INDEX_PATH)
+
+def show_figure(chart_id, filtros, build):
+    """Muestra la figura de `chart_id`; `build()` solo corre si no está en la cache."""
+    st.plotly_chart(cached_figure(chart_id, filtros, backend.version, build), use_container_width=True)
+
 # ==================== HEADER ====================
 st.title("🎬 Disney Movies Analytics Dashboard")
 st.markdown("---")
 
 # CONFIGURACIÓN: Cambiar a False si no tienes permisos Lambda
 USE_LAMBDA = False  # ← Cambiar a True cuando tengas permisos
+# Motor de consultas: "duckdb" (Parquet de spark_output/) o "pandas" (CSV en S3)
+QUERY_BACKEND = os.getenv("DISNEY_BACKEND", "duckdb")
 
 # Intentar obtener stats de Lambda
 lambda_stats = None
@@ -106,140 +132,145 @@ elif USE_LAMBDA:
     st.info("ℹ️ Lambda no disponible - usando datos de S3 directamente")
 
 # Cargar datos
-data = load_data_from_s3()
+backend = get_backend(QUERY_BACKEND, parquet_mtime(PARQUET_PATH))
+s3_source = None
+if backend is None:
+    s3_source = get_s3_source()
+    backend = s3_source.backend
 
-if data is None:
+if backend is None:
+    st.error(f"Error cargando datos: {s3_source.error}")
     st.stop()
 
-movies_df = data['movies']
-segment_df = data['segment']
-temporal_df = data['temporal']
-decade_df = data['decade']
-
-# Detectar columnas clave con nombres alternativos
-revenue_col = get_col(movies_df, ['box_office_revenue_clean', 'revenue', 'box_office_revenue', 'total_gross'])
-rating_col = get_col(movies_df, ['imdb_score', 'imdb_rating', 'rating', 'score'])  # ← CORRECCIÓN: imdb_score primero
-year_col = get_col(movies_df, ['release_year', 'year', 'Year'])
-title_col = get_col(movies_df, ['film_title', 'title', 'movie_title', 'name'])
-brand_col = get_col(movies_df, ['brand', 'studio', 'franchise'])
-segment_col = get_col(movies_df, ['segment', 'category', 'type'])
-chars_col = get_col(movies_df, ['character_count', 'characters', 'cast_count'])
-decade_col = get_col(movies_df, ['decade', 'period'])
-rating_cat_col = get_col(movies_df, ['rating_category', 'rating_cat', 'category'])
+if s3_source is not None:
+    loaded_at = datetime.fromtimestamp(s3_source.loaded_at).strftime('%Y-%m-%d %H:%M:%S')
+    if s3_source.refreshing:
+        st.caption(f"⏳ Mostrando snapshot del {loaded_at}; actualizando desde S3 en segundo plano...")
+    elif s3_source.error is not None:
+        st.warning(f"No se pudo actualizar desde S3 ({s3_source.error}); mostrando snapshot del {loaded_at}")
+
+imprimir_perfil()
+
+# Nombres canónicos del registro de esquemas (disney_schema): el pipeline escribe
+# con ellos y la lectura de S3 los normaliza, así que no hay que detectarlos
+revenue_col = 'box_office_revenue_clean'
+rating_col = 'imdb_score'
+year_col = 'release_year'
+title_col = 'film_title'
+brand_col = 'brand'
+segment_col = 'segment'
+chars_col = 'character_count'
+decade_col = 'decade'
+rating_cat_col = 'rating_category'
 
 # Debug info - Solo en sidebar (colapsado por defecto)
 if st.sidebar.checkbox("🔍 Mostrar Info Debug", value=False):
-    st.sidebar.write("**Columnas Detectadas:**")
+    st.sidebar.write("**Columnas:**")
+    st.sidebar.caption(f"Backend: `{backend.name}`")
     st.sidebar.caption(f"Revenue: `{revenue_col}`")
     st.sidebar.caption(f"Rating: `{rating_col}`")
     st.sidebar.caption(f"Year: `{year_col}`")
     st.sidebar.caption(f"Brand: `{brand_col}`")
     st.sidebar.caption(f"Segment: `{segment_col}`")
+    memoria = reporte_memoria()
+    if not memoria.empty:
+        st.sidebar.write("**Memoria (esquema compacto):**")
+        st.sidebar.dataframe(memoria, hide_index=True, use_container_width=True)
+
+with st.sidebar.expander("⏱️ Perfil de arranque"):
+    st.dataframe(perfil_imports(), hide_index=True, use_container_width=True)
 
 # ==================== SIDEBAR FILTROS ====================
 st.sidebar.header("🔍 Filtros")
 
+# Los filtros se acumulan como (columna, operador, valor) y el backend los aplica en el scan
+filtros = []
+
 # Filtro por años
-if year_col:
-    min_year = int(movies_df[year_col].min())
-    max_year = int(movies_df[year_col].max())
-    year_range = st.sidebar.slider(
-        "Rango de Años",
-        min_year, max_year, (min_year, max_year)
-    )
-    movies_filtered = movies_df[
-        (movies_df[year_col] >= year_range[0]) & 
-        (movies_df[year_col] <= year_range[1])
-    ]
-else:
-    movies_filtered = movies_df
+min_year, max_year = (int(v) for v in backend.bounds(year_col))
+year_range = st.sidebar.slider(
+    "Rango de Años",
+    min_year, max_year, (min_year, max_year)
+)
+filtros.append((year_col, "between", year_range))
 
 # Filtro por marca
-if brand_col:
-    brands = ['Todas'] + sorted(movies_filtered[brand_col].dropna().unique().tolist())
-    selected_brand = st.sidebar.selectbox("Marca Disney", brands)
-    if selected_brand != 'Todas':
-        movies_filtered = movies_filtered[movies_filtered[brand_col] == selected_brand]
+brands = ['Todas'] + backend.distinct(brand_col, filtros)
+selected_brand = st.sidebar.selectbox("Marca Disney", brands)
+if selected_brand != 'Todas':
+    filtros.append((brand_col, "=", selected_brand))
 
 # Filtro por segmento
-if segment_col:
-    segments = ['Todos'] + sorted(movies_filtered[segment_col].dropna().unique().tolist())
-    selected_segment = st.sidebar.selectbox("Segmento", segments)
-    if selected_segment != 'Todos':
-        movies_filtered = movies_filtered[movies_filtered[segment_col] == selected_segment]
+segments = ['Todos'] + backend.distinct(segment_col, filtros)
+selected_segment = st.sidebar.selectbox("Segmento", segments)
+if selected_segment != 'Todos':
+    filtros.append((segment_col, "=", selected_segment))
+
+filtros = tuple(filtros)
+total_movies = backend.count(filtros)
 
 # ==================== TABS ====================
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📊 Overview", 
-    "📈 Análisis Temporal", 
-    "🏆 Rankings", 
-    "👥 Personajes",
-    "💡 Insights"
-])
+# En modo perezoso solo se ejecuta el tab visible, así que un rerun cuesta lo que
+# cuesta ese tab y no la suma de todos. Dentro del tab, las figuras se sirven de
+# `cached_figure` (clave: gráfico, filtros, versión de datos) y solo se recalculan
+# cuando cambian los filtros de los que dependen. Los tabs no tienen controles
+# propios, así que no son fragmentos; la búsqueda de personajes sí lo es.
+LAZY_TABS = st.sidebar.toggle("⚡ Renderizar solo el tab visible", value=True)
 
 # ==================== TAB 1: OVERVIEW ====================
-with tab1:
+def render_overview(filtros, total_movies):
     st.header("Resumen General")
-    
-    # KPIs principales
+
+    # KPIs principales (una sola consulta)
+    kpis = backend.aggregate(filtros, None, {'revenue': (revenue_col, 'sum'),
+                                             'rating': (rating_col, 'mean'),
+                                             'chars': (chars_col, 'sum')}).iloc[0]
+
     col1, col2, col3, col4 = st.columns(4)
-    
+
     with col1:
-        total_movies = len(movies_filtered)
         st.metric("Total Películas", f"{total_movies:,}")
-    
+
     with col2:
-        if revenue_col:
-            total_revenue = movies_filtered[revenue_col].sum()
-            st.metric("Revenue Total", f"${total_revenue/1e9:.2f}B")
-        else:
-            st.metric("Revenue Total", "N/A")
-    
+        st.metric("Revenue Total", f"${kpis['revenue']/1e9:.2f}B")
+
     with col3:
-        if rating_col:
-            avg_rating = movies_filtered[rating_col].mean()
-            st.metric("Rating Promedio", f"{avg_rating:.2f} ⭐")
-        else:
-            st.metric("Rating Promedio", "N/A")
-    
+        st.metric("Rating Promedio", f"{kpis['rating']:.2f} ⭐")
+
     with col4:
-        if chars_col:
-            total_chars = movies_filtered[chars_col].sum()
-            st.metric("Total Personajes", f"{int(total_chars):,}")
-        else:
-            st.metric("Total Personajes", "N/A")
-    
+        st.metric("Total Personajes", f"{int(kpis['chars']):,}")
+
     st.markdown("---")
-    
+
     # Gráficos principales
     col1, col2 = st.columns(2)
-    
+
     with col1:
         st.subheader("Revenue por Marca")
-        if 'brand' in movies_filtered.columns and 'box_office_revenue_clean' in movies_filtered.columns:
-            brand_revenue = movies_filtered.groupby('brand')['box_office_revenue_clean'].sum().reset_index()
-            brand_revenue = brand_revenue.sort_values('box_office_revenue_clean', ascending=False)
-            
+        def build():
+            brand_revenue = backend.aggregate(filtros, brand_col, {revenue_col: (revenue_col, 'sum')})
+            brand_revenue = brand_revenue.sort_values(revenue_col, ascending=False)
+
             fig = px.bar(
                 brand_revenue,
-                x='brand',
-                y='box_office_revenue_clean',
+                x=brand_col,
+                y=revenue_col,
                 title="Revenue Total por Marca Disney",
-                labels={'box_office_revenue_clean': 'Revenue ($)', 'brand': 'Marca'},
-                color='box_office_revenue_clean',
+                labels={revenue_col: 'Revenue ($)', brand_col: 'Marca'},
+                color=revenue_col,
                 color_continuous_scale='Blues'
             )
             fig.update_layout(showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("Columnas 'brand' o 'revenue' no disponibles")
-    
+            return fig
+        show_figure("brand_revenue", filtros, build)
+
     with col2:
         st.subheader("Distribución de Ratings")
-        if 'rating_category' in movies_filtered.columns:
-            rating_dist = movies_filtered['rating_category'].value_counts().reset_index()
+        def build():
+            rating_dist = backend.aggregate(filtros, rating_cat_col, {'Cantidad': (None, 'count')})
+            rating_dist = rating_dist.sort_values('Cantidad', ascending=False)
             rating_dist.columns = ['Categoría', 'Cantidad']
-            
+
             fig = px.pie(
                 rating_dist,
                 names='Categoría',
@@ -247,16 +278,16 @@ with tab1:
                 title="Distribución por Categoría de Rating",
                 hole=0.4
             )
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("Columna 'rating_category' no disponible")
-    
+            return fig
+        show_figure("rating_distribution", filtros, build)
+
     # Segmentación
     st.subheader("Segmentación de Películas")
-    if 'segment' in movies_filtered.columns:
-        segment_counts = movies_filtered['segment'].value_counts().reset_index()
+    def build():
+        segment_counts = backend.aggregate(filtros, segment_col, {'Cantidad': (None, 'count')})
+        segment_counts = segment_counts.sort_values('Cantidad', ascending=False)
         segment_counts.columns = ['Segmento', 'Cantidad']
-        
+
         fig = px.bar(
             segment_counts,
             x='Segmento',
@@ -265,178 +296,162 @@ with tab1:
             color='Cantidad',
             color_continuous_scale='Greens'
         )
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Columna 'segment' no disponible")
+        return fig
+    show_figure("segment_counts", filtros, build)
 
 # ==================== TAB 2: ANÁLISIS TEMPORAL ====================
-with tab2:
+def render_temporal(filtros, total_movies):
     st.header("Análisis Temporal")
-    
+
     col1, col2 = st.columns(2)
-    
+
     with col1:
         st.subheader("Evolución de Revenue")
-        if 'release_year' in movies_filtered.columns and 'box_office_revenue_clean' in movies_filtered.columns:
-            yearly_revenue = movies_filtered.groupby('release_year')['box_office_revenue_clean'].sum().reset_index()
-            
+        def build():
+            yearly_revenue = backend.aggregate(filtros, year_col, {revenue_col: (revenue_col, 'sum')})
+
+            yearly_revenue = downsample_line(yearly_revenue, year_col, revenue_col)
+
             fig = px.line(
                 yearly_revenue,
-                x='release_year',
-                y='box_office_revenue_clean',
+                x=year_col,
+                y=revenue_col,
                 title="Revenue Anual",
-                labels={'release_year': 'Año', 'box_office_revenue_clean': 'Revenue ($)'},
+                labels={year_col: 'Año', revenue_col: 'Revenue ($)'},
                 markers=True
             )
             fig.update_traces(line_color='#0066CC', line_width=3)
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("Datos de año o revenue no disponibles")
-    
+            return fig
+        show_figure("yearly_revenue", filtros, build)
+
     with col2:
         st.subheader("Películas por Año")
-        if 'release_year' in movies_filtered.columns:
-            yearly_count = movies_filtered.groupby('release_year').size().reset_index(name='count')
-            
+        def build():
+            yearly_count = backend.aggregate(filtros, year_col, {'count': (None, 'count')})
+
             fig = px.bar(
                 yearly_count,
-                x='release_year',
+                x=year_col,
                 y='count',
                 title="Producción Anual",
-                labels={'release_year': 'Año', 'count': 'Cantidad'},
+                labels={year_col: 'Año', 'count': 'Cantidad'},
                 color='count',
                 color_continuous_scale='Oranges'
             )
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("Columna 'release_year' no disponible")
-    
+            return fig
+        show_figure("yearly_count", filtros, build)
+
     # Análisis por década
     st.subheader("Análisis por Década")
-    if 'decade' in movies_filtered.columns:
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            decade_count = movies_filtered.groupby('decade').size().reset_index(name='Películas')
+    col1, col2 = st.columns(2)
+
+    with col1:
+        def build():
+            decade_count = backend.aggregate(filtros, decade_col, {'Películas': (None, 'count')})
             fig = px.bar(
                 decade_count,
-                x='decade',
+                x=decade_col,
                 y='Películas',
                 title="Películas por Década",
                 color='Películas',
                 color_continuous_scale='Purples'
             )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            if 'box_office_revenue_clean' in movies_filtered.columns:
-                decade_revenue = movies_filtered.groupby('decade')['box_office_revenue_clean'].mean().reset_index()
-                decade_revenue.columns = ['Década', 'Revenue Promedio']
-                
-                fig = px.line(
-                    decade_revenue,
-                    x='Década',
-                    y='Revenue Promedio',
-                    title="Revenue Promedio por Década",
-                    markers=True
-                )
-                fig.update_traces(line_color='#FF6B6B', line_width=3)
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("Columna 'revenue' no disponible")
-    else:
-        st.info("Columna 'decade' no disponible")
+            return fig
+        show_figure("decade_count", filtros, build)
+
+    with col2:
+        def build():
+            decade_revenue = backend.aggregate(filtros, decade_col, {'Revenue Promedio': (revenue_col, 'mean')})
+            decade_revenue.columns = ['Década', 'Revenue Promedio']
+
+            decade_revenue = downsample_line(decade_revenue, 'Década', 'Revenue Promedio')
+
+            fig = px.line(
+                decade_revenue,
+                x='Década',
+                y='Revenue Promedio',
+                title="Revenue Promedio por Década",
+                markers=True
+            )
+            fig.update_traces(line_color='#FF6B6B', line_width=3)
+            return fig
+        show_figure("decade_revenue", filtros, build)
 
 # ==================== TAB 3: RANKINGS ====================
-with tab3:
+def render_rankings(filtros, total_movies):
     st.header("Rankings y Top Películas")
-    
+
     col1, col2 = st.columns(2)
-    
+
     with col1:
         st.subheader("🏆 Top 10 por Revenue")
-        if revenue_col and title_col and year_col:
-            top_revenue = movies_filtered.nlargest(10, revenue_col)[
-                [title_col, revenue_col, year_col]
-            ].copy()
-            top_revenue['Revenue ($M)'] = (top_revenue[revenue_col] / 1e6).round(2)
-            top_revenue = top_revenue.rename(columns={title_col: 'Película', year_col: 'Año'})
-            st.dataframe(
-                top_revenue[['Película', 'Año', 'Revenue ($M)']],
-                hide_index=True,
-                use_container_width=True
-            )
-        else:
-            st.info("Columnas necesarias no disponibles")
-    
+        top_revenue = backend.top_n(filtros, revenue_col, 10, [title_col, revenue_col, year_col])
+        top_revenue['Revenue ($M)'] = (top_revenue[revenue_col] / 1e6).round(2)
+        top_revenue = top_revenue.rename(columns={title_col: 'Película', year_col: 'Año'})
+        st.dataframe(
+            top_revenue[['Película', 'Año', 'Revenue ($M)']],
+            hide_index=True,
+            use_container_width=True
+        )
+
     with col2:
         st.subheader("⭐ Top 10 por Rating")
-        if rating_col and title_col and year_col:
-            top_rating = movies_filtered.nlargest(10, rating_col)[
-                [title_col, rating_col, year_col]
-            ].copy()
-            top_rating = top_rating.rename(columns={
-                title_col: 'Película',
-                rating_col: 'Rating',
-                year_col: 'Año'
-            })
-            st.dataframe(
-                top_rating[['Película', 'Año', 'Rating']],
-                hide_index=True,
-                use_container_width=True
-            )
-        else:
-            st.info("Columnas necesarias no disponibles")
-    
+        top_rating = backend.top_n(filtros, rating_col, 10, [title_col, rating_col, year_col])
+        top_rating = top_rating.rename(columns={
+            title_col: 'Película',
+            rating_col: 'Rating',
+            year_col: 'Año'
+        })
+        st.dataframe(
+            top_rating[['Película', 'Año', 'Rating']],
+            hide_index=True,
+            use_container_width=True
+        )
+
     # Gráfico: Rating vs Revenue
     st.subheader("Relación Rating vs Revenue")
-    if rating_col and revenue_col:
-        scatter_data = movies_filtered[[rating_col, revenue_col]].copy()
-        
-        # Agregar columnas opcionales para el hover
-        hover_cols = [title_col, year_col]
-        hover_data_dict = {}
-        for col in hover_cols:
-            if col and col in movies_filtered.columns:
-                scatter_data = pd.concat([scatter_data, movies_filtered[[col]]], axis=1)
-                hover_data_dict[col] = True
-        
+    def build():
+        # Solo las columnas que usa el gráfico
+        hover_data_dict = {title_col: True, year_col: True}
+        # Con muchas filas el backend agrupa en una rejilla y devuelve un punto por celda, con su conteo
+        scatter_data = backend.scatter(filtros, rating_col, revenue_col, color=brand_col, size=chars_col,
+                                       hover=list(hover_data_dict))
+        if 'puntos' in scatter_data.columns:
+            hover_data_dict = {'puntos': True}
+
         fig = px.scatter(
             scatter_data,
             x=rating_col,
             y=revenue_col,
-            color=brand_col if brand_col and brand_col in scatter_data.columns else None,
-            size=chars_col if chars_col and chars_col in scatter_data.columns else None,
-            hover_data=hover_data_dict if hover_data_dict else None,
+            color=brand_col,
+            size=chars_col,
+            hover_data=hover_data_dict,
             title="Correlación entre Rating IMDb y Revenue",
             labels={
                 rating_col: 'Rating IMDb',
                 revenue_col: 'Revenue ($)',
-                brand_col: 'Marca' if brand_col else None
+                brand_col: 'Marca'
             }
         )
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Datos de rating o revenue no disponibles")
+        return fig
+    show_figure("rating_vs_revenue", filtros, build)
 
 # ==================== TAB 4: PERSONAJES ====================
-with tab4:
+def render_personajes(filtros, total_movies):
     st.header("Análisis de Personajes")
-    
-    if 'character_count' in movies_filtered.columns:
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("Top 10 Películas con Más Personajes")
-            top_chars = movies_filtered.nlargest(10, 'character_count')[
-                ['film_title', 'character_count', 'release_year']
-            ].copy()
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Top 10 Películas con Más Personajes")
+        def build():
+            top_chars = backend.top_n(filtros, chars_col, 10, [title_col, chars_col, year_col])
             top_chars = top_chars.rename(columns={
-                'film_title': 'Película',
-                'character_count': 'Personajes',
-                'release_year': 'Año'
+                title_col: 'Película',
+                chars_col: 'Personajes',
+                year_col: 'Año'
             })
-            
+
             fig = px.bar(
                 top_chars,
                 x='Personajes',
@@ -446,140 +461,152 @@ with tab4:
                 color='Personajes',
                 color_continuous_scale='Teal'
             )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            st.subheader("Promedio de Personajes por Década")
-            if 'decade' in movies_filtered.columns:
-                decade_chars = movies_filtered.groupby('decade')['character_count'].mean().reset_index()
-                decade_chars.columns = ['Década', 'Promedio Personajes']
-                
-                fig = px.line(
-                    decade_chars,
-                    x='Década',
-                    y='Promedio Personajes',
-                    title="Evolución del Promedio de Personajes",
-                    markers=True
-                )
-                fig.update_traces(line_color='#9B59B6', line_width=3)
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("Columna 'decade' no disponible")
-        
-        # Tabla detallada
-        st.subheader("Detalle de Películas")
-        display_cols = []
-        if title_col: display_cols.append(title_col)
-        if year_col: display_cols.append(year_col)
-        if chars_col: display_cols.append(chars_col)
-        if rating_col: display_cols.append(rating_col)
-        if revenue_col: display_cols.append(revenue_col)
-        
-        if display_cols:
-            detail_df = movies_filtered[display_cols].copy()
-            if chars_col:
-                detail_df = detail_df.sort_values(chars_col, ascending=False).head(20)
-            st.dataframe(detail_df, hide_index=True, use_container_width=True)
-    else:
-        st.info("Columna 'character_count' no disponible")
+            return fig
+        show_figure("top_characters", filtros, build)
+
+    with col2:
+        st.subheader("Promedio de Personajes por Década")
+        def build():
+            decade_chars = backend.aggregate(filtros, decade_col, {'Promedio Personajes': (chars_col, 'mean')})
+            decade_chars.columns = ['Década', 'Promedio Personajes']
+
+            decade_chars = downsample_line(decade_chars, 'Década', 'Promedio Personajes')
+
+            fig = px.line(
+                decade_chars,
+                x='Década',
+                y='Promedio Personajes',
+                title="Evolución del Promedio de Personajes",
+                markers=True
+            )
+            fig.update_traces(line_color='#9B59B6', line_width=3)
+            return fig
+        show_figure("decade_characters", filtros, build)
+
+    # Tabla detallada
+    st.subheader("Detalle de Películas")
+    display_cols = [title_col, year_col, chars_col, rating_col, revenue_col]
+    detail_df = backend.top_n(filtros, chars_col, 20, display_cols)
+    st.dataframe(detail_df, hide_index=True, use_container_width=True)
+
+    buscar_personajes()
+
+@st.fragment
+def buscar_personajes():
+    """Búsqueda sobre el índice de personajes: al escribir solo se vuelve a ejecutar esta sección."""
+    st.subheader("🔍 Buscar Personajes")
+    meta_path = os.path.join(CHARACTER_INDEX_PATH, "meta.json")
+    if not os.path.exists(meta_path):
+        st.info("Índice de personajes no disponible: ejecuta `python disney_pipeline.py`")
+        return
+    index = get_character_index(os.path.getmtime(meta_path))
+
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        prefix = st.text_input("Nombre empieza con", key="character_prefix", placeholder="Ej. Mic")
+    with col2:
+        film = st.selectbox("Película", ["Todas"] + index.films, key="character_film")
+    with col3:
+        k = st.number_input("Top", min_value=5, max_value=100, value=20, step=5, key="character_k")
+
+    results = index.buscar(prefix, None if film == "Todas" else film, int(k))
+    st.caption(f"Top {len(results)} por apariciones de {len(index):,} personajes")
+    st.dataframe(results, hide_index=True, use_container_width=True)
 
 # ==================== TAB 5: INSIGHTS ====================
-with tab5:
+def render_insights(filtros, total_movies):
     st.header("💡 Insights Clave")
-    
+
+    segment_totals = backend.aggregate(filtros, segment_col, {'count': (None, 'count')})
+
     # Métricas avanzadas
     col1, col2, col3 = st.columns(3)
-    
+
     with col1:
-        if 'box_office_revenue_clean' in movies_filtered.columns:
-            revenue_per_movie = movies_filtered['box_office_revenue_clean'].mean()
-            st.metric(
-                "Revenue Promedio por Película",
-                f"${revenue_per_movie/1e6:.1f}M"
-            )
-    
+        revenue_per_movie = backend.aggregate(filtros, None, {'v': (revenue_col, 'mean')})['v'].iloc[0]
+        st.metric(
+            "Revenue Promedio por Película",
+            f"${revenue_per_movie/1e6:.1f}M"
+        )
+
     with col2:
-        if 'character_count' in movies_filtered.columns:
-            chars_per_movie = movies_filtered['character_count'].mean()
-            st.metric(
-                "Personajes Promedio",
-                f"{chars_per_movie:.1f}"
-            )
-    
+        chars_per_movie = backend.aggregate(filtros, None, {'v': (chars_col, 'mean')})['v'].iloc[0]
+        st.metric(
+            "Personajes Promedio",
+            f"{chars_per_movie:.1f}"
+        )
+
     with col3:
-        if 'segment' in movies_filtered.columns:
-            success_rate = (movies_filtered['segment'].str.contains('Éxito', na=False).sum() / len(movies_filtered) * 100)
-            st.metric(
-                "Tasa de Éxito",
-                f"{success_rate:.1f}%"
-            )
-    
+        exitos = segment_totals.loc[segment_totals[segment_col].str.contains('Éxito', na=False), 'count'].sum()
+        success_rate = (exitos / total_movies * 100) if total_movies else float('nan')
+        st.metric(
+            "Tasa de Éxito",
+            f"{success_rate:.1f}%"
+        )
+
     st.markdown("---")
-    
+
     # Insights textuales
     st.subheader("📊 Hallazgos Principales")
-    
+
     insights = []
-    
+
     # Insight 1: Marca más exitosa
-    if 'brand' in movies_filtered.columns and 'box_office_revenue_clean' in movies_filtered.columns:
-        top_brand = movies_filtered.groupby('brand')['box_office_revenue_clean'].sum().idxmax()
-        top_brand_revenue = movies_filtered.groupby('brand')['box_office_revenue_clean'].sum().max()
-        insights.append(f"🏆 **{top_brand}** es la marca más exitosa con ${top_brand_revenue/1e9:.2f}B en revenue total")
-    
+    brand_totals = backend.aggregate(filtros, brand_col, {'revenue': (revenue_col, 'sum')})
+    if not brand_totals.empty:
+        top_row = brand_totals.loc[brand_totals['revenue'].idxmax()]
+        insights.append(f"🏆 **{top_row[brand_col]}** es la marca más exitosa con ${top_row['revenue']/1e9:.2f}B en revenue total")
+
     # Insight 2: Década dorada
-    if 'decade' in movies_filtered.columns:
-        decade_counts = movies_filtered['decade'].value_counts()
-        top_decade = decade_counts.idxmax()
-        insights.append(f"🎬 La **década de {top_decade}** fue la más productiva con {decade_counts.max()} películas")
-    
+    decade_counts = backend.aggregate(filtros, decade_col, {'count': (None, 'count')})
+    if not decade_counts.empty:
+        top_row = decade_counts.loc[decade_counts['count'].idxmax()]
+        insights.append(f"🎬 La **década de {top_row[decade_col]}** fue la más productiva con {top_row['count']} películas")
+
     # Insight 3: Rating vs Revenue
-    if rating_col and revenue_col:
-        corr_data = movies_filtered[[rating_col, revenue_col]].dropna()
-        if len(corr_data) > 0:
-            correlation = corr_data[rating_col].corr(corr_data[revenue_col])
-            if correlation > 0.5:
-                insights.append(f"⭐ Fuerte correlación positiva ({correlation:.2f}) entre rating y revenue")
-            elif correlation < 0:
-                insights.append(f"📉 Correlación negativa ({correlation:.2f}) entre rating y revenue")
-            else:
-                insights.append(f"➡️ Correlación moderada ({correlation:.2f}) entre rating y revenue")
-    
+    correlation = backend.corr(filtros, rating_col, revenue_col)
+    if pd.notna(correlation):
+        if correlation > 0.5:
+            insights.append(f"⭐ Fuerte correlación positiva ({correlation:.2f}) entre rating y revenue")
+        elif correlation < 0:
+            insights.append(f"📉 Correlación negativa ({correlation:.2f}) entre rating y revenue")
+        else:
+            insights.append(f"➡️ Correlación moderada ({correlation:.2f}) entre rating y revenue")
+
     # Insight 4: Personajes
-    if chars_col and revenue_col:
-        char_data = movies_filtered[[chars_col, revenue_col]].dropna()
-        if len(char_data) > 0:
-            char_corr = char_data[chars_col].corr(char_data[revenue_col])
-            if char_corr > 0.3:
-                insights.append(f"👥 Mayor cantidad de personajes se asocia con mayor revenue (correlación: {char_corr:.2f})")
-    
+    char_corr = backend.corr(filtros, chars_col, revenue_col)
+    if pd.notna(char_corr) and char_corr > 0.3:
+        insights.append(f"👥 Mayor cantidad de personajes se asocia con mayor revenue (correlación: {char_corr:.2f})")
+
     for insight in insights:
         st.markdown(f"- {insight}")
-    
+
     # Comparación de segmentos
-    if 'segment' in movies_filtered.columns and 'box_office_revenue_clean' in movies_filtered.columns:
-        st.subheader("Comparación por Segmento")
-        
-        # Construir dict de agregación dinámicamente
-        agg_dict = {
-            'film_title': 'count',
-            'box_office_revenue_clean': 'mean'
-        }
-        
-        # Solo agregar imdb_rating si existe
-        if 'imdb_rating' in movies_filtered.columns:
-            agg_dict['imdb_rating'] = 'mean'
-        
-        segment_analysis = movies_filtered.groupby('segment').agg(agg_dict).reset_index()
-        
-        # Renombrar columnas
-        new_cols = ['Segmento', 'Películas', 'Revenue Promedio']
-        if 'imdb_rating' in movies_filtered.columns:
-            new_cols.append('Rating Promedio')
-        
-        segment_analysis.columns = new_cols
-        st.dataframe(segment_analysis, hide_index=True, use_container_width=True)
+    st.subheader("Comparación por Segmento")
+    segment_analysis = backend.aggregate(filtros, segment_col, {
+        'Películas': (title_col, 'count'),
+        'Revenue Promedio': (revenue_col, 'mean'),
+        'Rating Promedio': (rating_col, 'mean'),
+    })
+    segment_analysis = segment_analysis.rename(columns={segment_col: 'Segmento'})
+    st.dataframe(segment_analysis, hide_index=True, use_container_width=True)
+
+TABS = {
+    "📊 Overview": render_overview,
+    "📈 Análisis Temporal": render_temporal,
+    "🏆 Rankings": render_rankings,
+    "👥 Personajes": render_personajes,
+    "💡 Insights": render_insights,
+}
+
+if LAZY_TABS:
+    selected_tab = st.radio("Sección", list(TABS), horizontal=True, key="selected_tab", label_visibility="collapsed")
+    TABS[selected_tab](filtros, total_movies)
+else:
+    for tab, render in zip(st.tabs(list(TABS)), TABS.values()):
+        with tab:
+            render(filtros, total_movies)
 
 # ==================== FOOTER ====================
 st.markdown("---")
-st.caption(f"📅 Última actualización: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | 🎬 Disney Data Pipeline Project")
\ No newline at end of file
+st.caption(f"📅 Última actualización: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | 🎬 Disney Data Pipeline Project")
@@ -0,0 +1,272 @@
+"""
+Índice de búsqueda de personajes para la pestaña Personajes del dashboard.
+
+Lo construye el pipeline (tarea `indice_personajes` de disney_pipeline.py) a
+partir de characters_cleaned y relations, y el dashboard lo abre con
+np.load(mmap_mode="r"): no se copia a memoria, solo se leen las páginas que
+toca cada consulta.
+
+Estructura (un .npy por arreglo dentro de `out_dir`):
+
+- keys / order / rank: nombres normalizados (minúsculas, sin acentos, UTF-8)
+  en un arreglo ordenado; un prefijo es un rango [lo, hi) vía searchsorted.
+- prefix_*: top-K ya resuelto para prefijos de 1-2 bytes, donde el rango
+  abarca una fracción grande de los personajes.
+- film_offsets / film_postings: lista de personajes por película (CSR).
+- score: apariciones desempatadas por orden alfabético, para que la
+  selección parcial (argpartition) del top-K sea determinista.
+
+Uso:
+    python disney_character_index.py --rows 2000000   # benchmark con datos sintéticos
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+INDEX_PATH = os.getenv("DISNEY_CHARACTER_INDEX", "spark_output/characters_index")
+KEY_BYTES = 64
+PREFIX_LEN = 2
+PREFIX_TOP = 50
+GLOBAL_TOP = 1000
+
+
+def normalizar(texto) -> bytes:
+    """Llave de búsqueda: minúsculas, sin acentos, UTF-8 truncado a KEY_BYTES."""
+    texto = unicodedata.normalize("NFKD", str(texto).casefold())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return texto.strip().encode("utf-8")[:KEY_BYTES]
+
+
+def top_k(ids: np.ndarray, score: np.ndarray, k: int) -> np.ndarray:
+    """Los `k` ids de mayor score, ordenados; argpartition en lugar de ordenar todo."""
+    if len(ids) > k:
+        ids = ids[np.argpartition(-score[ids], k - 1)[:k]]
+    return ids[np.argsort(-score[ids])]
+
+
+def _texto_csr(values):
+    """Lista de strings → (bytes concatenados, offsets), para leerlos con mmap."""
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def construir_indice(df_characters: pd.DataFrame, df_relations: pd.DataFrame, out_dir=INDEX_PATH):
+    """Escribe el índice en `out_dir` (primero en un directorio temporal y luego lo intercambia)."""
+    out_dir = Path(out_dir)
+    tmp = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    chars = df_characters.dropna(subset=["name"]).drop_duplicates(subset=["name"]).reset_index(drop=True)
+    n = len(chars)
+
+    def int_col(col, dtype):
+        if col not in chars.columns:
+            return np.zeros(n, dtype=dtype)
+        return pd.to_numeric(chars[col], errors="coerce").fillna(0).to_numpy(dtype)
+
+    appearances = int_col("total_appearances", np.int32)
+    arrays = {
+        "appearances": appearances,
+        "num_films": int_col("num_films", np.int32),
+        "num_tv_shows": int_col("num_tv_shows", np.int32),
+    }
+    popularity = pd.Categorical(chars["popularity_category"]) if "popularity_category" in chars.columns \
+        else pd.Categorical([None] * n)
+    arrays["popularity"] = popularity.codes.astype(np.int8)
+    arrays["names_blob"], arrays["names_offsets"] = _texto_csr(chars["name"])
+
+    keys = np.array([normalizar(name) for name in chars["name"]], dtype=f"S{KEY_BYTES}")
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    rank = np.empty(n, dtype=np.int32)
+    rank[order] = np.arange(n, dtype=np.int32)
+    arrays["keys"], arrays["order"], arrays["rank"] = keys[order], order, rank
+    # Desempate alfabético: score único por personaje
+    score = appearances.astype(np.int64) * max(n, 1) + (n - 1 - rank)
+    arrays["score"] = score
+    arrays["top_global"] = top_k(np.arange(n, dtype=np.int32), score, GLOBAL_TOP).astype(np.int32)
+
+    # Top-K precalculado para prefijos cortos (rangos grandes del arreglo ordenado)
+    prefix_keys, prefix_offsets, prefix_top = [], [0], []
+    for length in range(1, PREFIX_LEN + 1):
+        truncated = arrays["keys"].astype(f"S{length}")
+        uniques, starts = np.unique(truncated, return_index=True)
+        ends = np.append(starts[1:], n)
+        for prefix, lo, hi in zip(uniques, starts, ends):
+            if len(prefix) < length:
+                continue
+            ids = top_k(order[lo:hi], score, PREFIX_TOP)
+            prefix_keys.append(prefix)
+            prefix_top.append(ids)
+            prefix_offsets.append(prefix_offsets[-1] + len(ids))
+    prefix_sort = np.argsort(np.array(prefix_keys, dtype=f"S{PREFIX_LEN}"), kind="stable")
+    arrays["prefix_keys"] = np.array(prefix_keys, dtype=f"S{PREFIX_LEN}")[prefix_sort]
+    lengths = np.diff(prefix_offsets)[prefix_sort]
+    arrays["prefix_offsets"] = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    arrays["prefix_top"] = np.concatenate([prefix_top[i] for i in prefix_sort]).astype(np.int32) \
+        if prefix_top else np.zeros(0, dtype=np.int32)
+
+    # Listas de personajes por película (CSR, ids ordenados)
+    films = []
+    if df_relations is not None and not df_relations.empty:
+        ids_by_name = pd.Series(np.arange(n, dtype=np.int32), index=chars["name"])
+        rel = df_relations[["character_name", "movie_title"]].dropna()
+        rel = rel.assign(char_id=rel["character_name"].map(ids_by_name)).dropna(subset=["char_id"])
+        rel = rel.drop_duplicates(subset=["movie_title", "char_id"]).sort_values(["movie_title", "char_id"])
+        film_codes, films = pd.factorize(rel["movie_title"], sort=True)
+        arrays["film_postings"] = rel["char_id"].to_numpy(np.int32)
+        arrays["film_offsets"] = np.concatenate([[0], np.cumsum(np.bincount(film_codes, minlength=len(films)))]).astype(np.int64)
+        films = films.tolist()
+    else:
+        arrays["film_postings"] = np.zeros(0, dtype=np.int32)
+        arrays["film_offsets"] = np.zeros(1, dtype=np.int64)
+
+    for name, array in arrays.items():
+        np.save(tmp / f"{name}.npy", array)
+    meta = {"n_characters": n, "popularity_labels": [str(c) for c in popularity.categories], "films": films}
+    (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+    # El índice anterior se aparta con un rename y se borra después: quien lo
+    # lea nunca ve un directorio a medio borrar o a medio escribir
+    old = out_dir.with_name(out_dir.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if out_dir.exists():
+        os.replace(out_dir, old)
+    os.replace(tmp, out_dir)
+    shutil.rmtree(old, ignore_errors=True)
+    return out_dir
+
+
+class CharacterIndex:
+    """Índice abierto con mmap; las consultas devuelven solo las filas pedidas."""
+
+    def __init__(self, path=INDEX_PATH):
+        path = Path(path)
+        self.meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        for f in path.glob("*.npy"):
+            setattr(self, f.stem, np.load(f, mmap_mode="r"))
+        self.films = self.meta["films"]
+        self._film_pos = {title: i for i, title in enumerate(self.films)}
+
+    def __len__(self):
+        return self.meta["n_characters"]
+
+    def _prefix_range(self, key: bytes):
+        lo = int(np.searchsorted(self.keys, key, side="left"))
+        # 0xFF no aparece en UTF-8: cota superior de todas las llaves con ese prefijo
+        hi = int(np.searchsorted(self.keys, key + b"\xff", side="left"))
+        return lo, hi
+
+    def film_ids(self, film: str) -> np.ndarray:
+        i = self._film_pos.get(film)
+        if i is None:
+            return np.zeros(0, dtype=np.int32)
+        return np.asarray(self.film_postings[self.film_offsets[i]:self.film_offsets[i + 1]])
+
+    def buscar_ids(self, prefix: str = "", film: str = None, k: int = 10) -> np.ndarray:
+        """Ids del top-`k` por apariciones cuyo nombre empieza con `prefix` (y aparecen en `film`)."""
+        key = normalizar(prefix)
+        if film:
+            ids = self.film_ids(film)
+            if key:
+                lo, hi = self._prefix_range(key)
+                r = self.rank[ids]
+                ids = ids[(r >= lo) & (r < hi)]
+            return top_k(ids, self.score, k)
+        if not key and k <= len(self.top_global):
+            return np.asarray(self.top_global[:k])
+        if 0 < len(key) <= PREFIX_LEN and k <= PREFIX_TOP:
+            i = int(np.searchsorted(self.prefix_keys, key))
+            if i < len(self.prefix_keys) and self.prefix_keys[i] == key:
+                return np.asarray(self.prefix_top[self.prefix_offsets[i]:self.prefix_offsets[i + 1]][:k])
+            return np.zeros(0, dtype=np.int32)
+        lo, hi = self._prefix_range(key)
+        return top_k(np.asarray(self.order[lo:hi]), self.score, k)
+
+    def nombre(self, i: int) -> str:
+        return bytes(self.names_blob[self.names_offsets[i]:self.names_offsets[i + 1]]).decode("utf-8")
+
+    def autocompletar(self, prefix: str, k: int = 10, film: str = None) -> list:
+        return [self.nombre(i) for i in self.buscar_ids(prefix, film, k)]
+
+    def buscar(self, prefix: str = "", film: str = None, k: int = 20) -> pd.DataFrame:
+        ids = self.buscar_ids(prefix, film, k)
+        labels = self.meta["popularity_labels"]
+        return pd.DataFrame({
+            "Nombre": [self.nombre(i) for i in ids],
+            "Apariciones": self.appearances[ids],
+            "Películas": self.num_films[ids],
+            "Series": self.num_tv_shows[ids],
+            "Popularidad": [labels[c] if c >= 0 else None for c in self.popularity[ids]],
+        })
+
+
+def personajes_sinteticos(rows: int, n_films: int = 5000, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    syllables = np.array(["ka", "mi", "lo", "ra", "ne", "to", "su", "el", "an", "bo", "ri", "za"])
+    parts = syllables[rng.integers(0, len(syllables), (rows, 3))]
+    names = pd.Series(np.char.add(np.char.add(np.char.add(parts[:, 0], parts[:, 1]), parts[:, 2]),
+                                  np.char.add(" ", np.arange(rows).astype(str)))).str.title()
+    num_films = rng.poisson(1.5, rows)
+    num_tv = rng.poisson(1.0, rows)
+    chars = pd.DataFrame({"name": names, "num_films": num_films, "num_tv_shows": num_tv,
+                          "total_appearances": num_films + num_tv})
+    chars["popularity_category"] = pd.cut(chars["total_appearances"], bins=[-1, 0, 5, 15, 100],
+                                          labels=["Sin Apariciones", "Baja", "Media", "Alta"])
+    char_idx = np.repeat(np.arange(rows), num_films)
+    relations = pd.DataFrame({"character_name": names.to_numpy()[char_idx],
+                              "movie_title": np.char.add("Film ", rng.integers(0, n_films, len(char_idx)).astype(str))})
+    return chars, relations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--out", default="bench_data/characters_index")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    chars, relations = personajes_sinteticos(args.rows)
+    start = time.perf_counter()
+    construir_indice(chars, relations, args.out)
+    print(f"Índice de {args.rows:,} personajes construido en {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    index = CharacterIndex(args.out)
+    print(f"Carga (mmap): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = np.random.default_rng(0)
+    names = chars["name"].to_numpy()
+    samples = names[rng.integers(0, len(names), args.queries)]
+    films = rng.choice(index.films, args.queries)
+    cases = {
+        "prefijo 1 letra": [s[:1] for s in samples],
+        "prefijo 2 letras": [s[:2] for s in samples],
+        "prefijo 3 letras": [s[:3] for s in samples],
+        "prefijo 5 letras": [s[:5] for s in samples],
+        "película + prefijo": list(zip(films, [s[:2] for s in samples])),
+    }
+    print(f"{'consulta':>20} | {'p50 (ms)':>8} | {'p99 (ms)':>8}")
+    for label, queries in cases.items():
+        times = []
+        for q in queries:
+            t = time.perf_counter()
+            if isinstance(q, tuple):
+                index.autocompletar(q[1], 10, film=q[0])
+            else:
+                index.autocompletar(q, 10)
+            times.append((time.perf_counter() - t) * 1000)
+        print(f"{label:>20} | {np.percentile(times, 50):>8.3f} | {np.percentile(times, 99):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Limpieza de Fase 2 (notebook 02) como funciones, para poder correrla fuera
+del notebook (disney_pipeline.py). Misma lógica que las celdas 4-9 del notebook.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_title(title):
+    """Normaliza título de película para matching"""
+    if pd.isna(title):
+        return ''
+    title = str(title).lower()
+    title = re.sub(r'[^\w\s]', '', title)
+    title = re.sub(r'\s+', ' ', title)
+    return title.strip()
+
+
+def clean_revenue(value):
+    if pd.isna(value):
+        return np.nan
+    value_str = str(value).replace('$', '').replace(',', '').replace(' ', '')
+    try:
+        return float(value_str)
+    except ValueError:
+        return np.nan
+
+
+def segment_movie(rating, revenue):
+    """Segmenta películas por rating y revenue"""
+    if pd.isna(rating) or pd.isna(revenue):
+        return 'Sin Clasificar'
+    high_rating = rating >= 7.0
+    high_revenue = revenue >= 300_000_000
+    if high_rating and high_revenue:
+        return 'Éxito Crítico y Comercial'
+    elif high_rating:
+        return 'Éxito Crítico'
+    elif high_revenue:
+        return 'Éxito Comercial'
+    return 'Bajo Rendimiento'
+
+
+def limpiar_peliculas(df_movies: pd.DataFrame) -> pd.DataFrame:
+    """Duplicados, fechas, revenue, ratings, décadas, categorías, segmento y título normalizado."""
+    df_movies = df_movies.drop_duplicates().copy()
+
+    date_cols = [col for col in df_movies.columns if 'date' in col.lower() or 'year' in col.lower()]
+    if date_cols:
+        df_movies['release_date'] = pd.to_datetime(df_movies[date_cols[0]], errors='coerce')
+        df_movies['release_year'] = df_movies['release_date'].dt.year
+        df_movies['release_month'] = df_movies['release_date'].dt.month
+        df_movies['release_quarter'] = df_movies['release_date'].dt.quarter
+        df_movies['release_day_of_week'] = df_movies['release_date'].dt.day_name()
+
+    revenue_cols = [col for col in df_movies.columns if 'revenue' in col.lower() or 'gross' in col.lower() or 'box' in col.lower()]
+    if revenue_cols:
+        df_movies['box_office_revenue_clean'] = df_movies[revenue_cols[0]].apply(clean_revenue)
+
+    rating_cols = [col for col in df_movies.columns if 'rating' in col.lower() or 'score' in col.lower() or 'imdb' in col.lower()]
+    for col in rating_cols:
+        if df_movies[col].dtype == 'object':
+            df_movies[col] = pd.to_numeric(df_movies[col].astype(str).str.replace('%', ''), errors='coerce')
+
+    if 'release_year' in df_movies.columns:
+        df_movies['decade'] = (df_movies['release_year'] // 10) * 10
+        df_movies['decade_label'] = df_movies['decade'].astype(str) + 's'
+
+    imdb_col = [col for col in df_movies.columns if 'imdb' in col.lower()]
+    if imdb_col:
+        df_movies['rating_category'] = pd.cut(
+            df_movies[imdb_col[0]],
+            bins=[0, 5, 6.5, 7.5, 10],
+            labels=['Bajo', 'Medio', 'Alto', 'Excelente']
+        )
+
+    if imdb_col and 'box_office_revenue_clean' in df_movies.columns:
+        df_movies['segment'] = [segment_movie(r, v) for r, v in
+                                zip(df_movies[imdb_col[0]], df_movies['box_office_revenue_clean'])]
+    else:
+        df_movies['segment'] = 'Sin Clasificar'
+
+    title_cols = [col for col in df_movies.columns if 'title' in col.lower() or 'movie' in col.lower() or 'film' in col.lower()]
+    if title_cols:
+        title_col = title_cols[0]
+        df_movies['film_title'] = df_movies[title_col]
+        df_movies['film_title_clean'] = df_movies[title_col].apply(normalize_title)
+    return df_movies
+
+
+def limpiar_personajes(df_characters: pd.DataFrame) -> pd.DataFrame:
+    """Duplicados por nombre, conteo de películas/series y categoría de popularidad."""
+    df_characters = df_characters.drop_duplicates(
+        subset=['name'] if 'name' in df_characters.columns else None
+    ).copy()
+
+    if 'films' in df_characters.columns:
+        df_characters['num_films'] = df_characters['films'].apply(lambda x: len(x) if isinstance(x, list) else 0)
+    if 'tvShows' in df_characters.columns:
+        df_characters['num_tv_shows'] = df_characters['tvShows'].apply(lambda x: len(x) if isinstance(x, list) else 0)
+
+    if 'num_films' in df_characters.columns and 'num_tv_shows' in df_characters.columns:
+        df_characters['total_appearances'] = df_characters['num_films'] + df_characters['num_tv_shows']
+        df_characters['popularity_category'] = pd.cut(
+            df_characters['total_appearances'],
+            bins=[-1, 0, 5, 15, 100],
+            labels=['Sin Apariciones', 'Baja', 'Media', 'Alta']
+        )
+    return df_characters
+
+
+def crear_relaciones(df_characters: pd.DataFrame) -> pd.DataFrame:
+    """Una fila por (personaje, película) con el título normalizado."""
+    if 'films' not in df_characters.columns or 'name' not in df_characters.columns:
+        return pd.DataFrame()
+    relations = [
+        {'character_name': name, 'movie_title': film, 'movie_title_clean': normalize_title(film)}
+        for name, films in zip(df_characters['name'], df_characters['films'])
+        if isinstance(films, list)
+        for film in films
+    ]
+    return pd.DataFrame(relations)
@@ -0,0 +1,115 @@
+"""
+Capa de figuras Plotly para dashboard_disney.py.
+
+- `cached_figure`: guarda la figura ya construida por (id de gráfico, filtros,
+  versión de datos); un rerun con el mismo estado no vuelve a consultar ni a
+  construir la figura.
+- `downsample_line` (LTTB) y `bin_scatter` (agregación por celdas) acotan el
+  número de puntos que se serializan y se envían al navegador. Los backends
+  de disney_queries exponen `scatter`, que hace esa misma agregación en SQL
+  (DuckDB) o con `bin_scatter` (pandas).
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+FIGURE_CACHE_SIZE = 256
+LINE_MAX_POINTS = 2000
+SCATTER_MAX_POINTS = 5000
+SCATTER_BINS = 150
+# Grupo de color para las filas sin valor (no se descartan del scatter)
+SCATTER_UNKNOWN = "Desconocido"
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+
+def cached_figure(chart_id: str, filtros, data_version, build):
+    """
+    Devuelve la figura de `chart_id` para este estado de filtros y versión de
+    datos, llamando a `build()` solo si no está en la cache (LRU).
+    Se guarda el objeto Figure, no su JSON: st.plotly_chart no acepta JSON ya
+    serializado y en cada rerun valida y serializa lo que recibe, así que la
+    cache ahorra la consulta y la construcción, no la serialización (esa la
+    acotan el downsampling y la agregación del scatter).
+    """
+    key = (chart_id, tuple(filtros), data_version)
+    with _lock:
+        if key in _figures:
+            _figures.move_to_end(key)
+            return _figures[key]
+    fig = build()
+    with _lock:
+        _figures[key] = fig
+        while len(_figures) > FIGURE_CACHE_SIZE:
+            _figures.popitem(last=False)
+    return fig
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: índices de `n_out` puntos que conservan la
+    forma de la serie (x debe estar ordenado). Siempre incluye el primero y el último.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Promedio del siguiente bucket (o el último punto)
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + int(np.argmax(area))
+        keep[i + 1] = prev
+    return keep
+
+
+def downsample_line(df: pd.DataFrame, x: str, y: str, max_points: int = LINE_MAX_POINTS) -> pd.DataFrame:
+    """Serie ordenada por `x` reducida con LTTB si supera `max_points`."""
+    data = df.dropna(subset=[x, y]).sort_values(x)
+    if len(data) <= max_points:
+        return data
+    return data.iloc[lttb(data[x].to_numpy(), data[y].to_numpy(), max_points)]
+
+
+def fill_unknown(values: pd.Series, label: str = SCATTER_UNKNOWN) -> pd.Series:
+    """`values` con los nulos reemplazados por `label` (también en categóricas)."""
+    if not values.isna().any():
+        return values
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        if label not in values.cat.categories:
+            values = values.cat.add_categories([label])
+        return values.fillna(label)
+    return values.astype("object").fillna(label)
+
+
+def bin_scatter(df: pd.DataFrame, x: str, y: str, color: str = None, size: str = None,
+                max_points: int = SCATTER_MAX_POINTS, bins: int = SCATTER_BINS) -> pd.DataFrame:
+    """
+    Si hay más de `max_points` filas, agrupa en una rejilla bins × bins (por
+    color) y devuelve un punto por celda ocupada: x/y/size promedio y la
+    columna `puntos` con cuántas filas representa. Las filas sin color van al
+    grupo SCATTER_UNKNOWN.
+    """
+    data = df.dropna(subset=[x, y])
+    if color:
+        data = data.assign(**{color: fill_unknown(data[color])})
+    if len(data) <= max_points:
+        return data
+    keys = [pd.cut(data[x], bins, labels=False).rename("_bin_x"), pd.cut(data[y], bins, labels=False).rename("_bin_y")]
+    if color:
+        keys.append(data[color])
+    aggs = {x: (x, "mean"), y: (y, "mean"), "puntos": (x, "size")}
+    if size and size not in (x, y):
+        aggs[size] = (size, "mean")
+    binned = data.groupby(keys, observed=True, sort=False).agg(**aggs).reset_index()
+    return binned.drop(columns=["_bin_x", "_bin_y"])
@@ -0,0 +1,459 @@
+"""
+Orquestador del pipeline Disney (fases 1-3 de los notebooks) como grafo de tareas.
+
+Cada tarea declara sus archivos de entrada y salida; las dependencias salen
+de ahí (una tarea depende de quien produce sus entradas). El runner:
+
+- ejecuta en paralelo las tareas listas (subidas a S3 y descarga de la API
+  se solapan con la limpieza y el procesamiento),
+- omite las tareas cuyas entradas (hash de contenido) y parámetros no
+  cambiaron desde la última corrida exitosa y cuyas salidas siguen en disco,
+- si una tarea falla, bloquea solo a sus dependientes; la siguiente corrida
+  retoma desde ahí porque lo exitoso se omite,
+- registra tiempos por tarea en `.pipeline/runs.jsonl` y muestra la ruta crítica.
+
+Uso:
+    python disney_pipeline.py --offline            # stand-ins locales, sin red ni AWS
+    python disney_pipeline.py                      # Kaggle CSV + Disney API + S3
+    python disney_pipeline.py --force limpiar_peliculas
+    python disney_pipeline.py --only publicar_final
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from disney_character_index import construir_indice
+from disney_cleaning import crear_relaciones, limpiar_peliculas, limpiar_personajes
+from disney_processing import ENGINE, agregar, elegir_backend, enriquecer, guardar_agregados, guardar_enriquecido
+from disney_schema import aplicar_esquema, reporte_memoria
+
+STATE_DIR = ".pipeline"
+OFFLINE_DIR = "pipeline_offline"
+API_URL = os.getenv("DISNEY_API_URL", "https://api.disneyapi.dev/character")
+# Sin límite se recorren todas las páginas que informa la API (info.totalPages)
+MAX_PAGES = int(os.getenv("DISNEY_API_MAX_PAGES", 0)) or None
+# pixar_loader (sesión con pool y reintentos, descarga paralela de páginas) vive en Semana 1
+LOADER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Semana 1")
+S3_RAW_PREFIX = 'disney-project/raw'
+S3_CLEANED_PREFIX = 'disney-project/cleaned'
+S3_FINAL_PREFIX = 'disney-project/final'
+
+
+class Task:
+    """
+    Paso del pipeline. `fn()` debe escribir todas las `outputs`.
+    `params` entra a la huella (p. ej. URL o backend); `always=True` para
+    fuentes externas que no se pueden comparar por contenido (la API en línea).
+    """
+
+    def __init__(self, name, fn, inputs=(), outputs=(), params=None, always=False):
+        self.name = name
+        self.fn = fn
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.params = params or {}
+        self.always = always
+
+
+def dependencias(tasks) -> dict:
+    """{tarea: tareas que producen alguna de sus entradas}; valida salidas únicas y ciclos."""
+    producer = {}
+    for task in tasks:
+        for out in task.outputs:
+            if out in producer:
+                raise ValueError(f"{out} lo producen {producer[out]} y {task.name}")
+            producer[out] = task.name
+    deps = {task.name: {producer[p] for p in task.inputs if p in producer} for task in tasks}
+
+    visiting, done = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Ciclo en el pipeline en {name}")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in deps:
+        visit(name)
+    return deps
+
+
+_hash_cache = {}
+_hash_lock = threading.Lock()
+
+
+def file_hash(path: Path) -> str:
+    """SHA-1 del contenido (o de todos los archivos si es un directorio, como los Parquet de Spark)."""
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    h = hashlib.sha1()
+    for f in files:
+        stat = f.stat()
+        key = (str(f), stat.st_size, stat.st_mtime_ns)
+        with _hash_lock:
+            digest = _hash_cache.get(key)
+        if digest is None:
+            fh = hashlib.sha1()
+            with open(f, "rb") as fp:
+                for chunk in iter(lambda: fp.read(1 << 20), b""):
+                    fh.update(chunk)
+            digest = fh.hexdigest()
+            with _hash_lock:
+                _hash_cache[key] = digest
+        h.update(f.relative_to(path).as_posix().encode() if path.is_dir() else b"")
+        h.update(digest.encode())
+    return h.hexdigest()
+
+
+def huella(task: Task) -> str:
+    h = hashlib.sha1(task.name.encode())
+    h.update(json.dumps(task.params, sort_keys=True, default=str).encode())
+    for path in task.inputs:
+        h.update(str(path).encode())
+        h.update(file_hash(path).encode())
+    return h.hexdigest()
+
+
+def ruta_critica(tasks, deps, seconds: dict):
+    """Camino más largo del grafo con los tiempos de esta corrida: (segundos, [tareas])."""
+    order = {t.name: i for i, t in enumerate(tasks)}
+    best = {}
+
+    def longest(name):
+        if name not in best:
+            prev = max((longest(d) for d in deps[name]), key=lambda item: item[0], default=(0.0, []))
+            best[name] = (prev[0] + seconds.get(name, 0.0), prev[1] + [name])
+        return best[name]
+
+    return max((longest(name) for name in sorted(deps, key=order.get)), key=lambda item: item[0], default=(0.0, []))
+
+
+def run(tasks, max_workers: int = 4, state_dir=STATE_DIR, force=(), only=None, log=print) -> dict:
+    """
+    Ejecuta el grafo. `force` fuerza tareas (y por contenido, sus dependientes);
+    `only` ejecuta solo esas tareas, con las entradas que ya haya en disco.
+    Devuelve {tarea: {"status", "seconds", "error"}}.
+    """
+    deps = dependencias(tasks)
+    by_name = {t.name: t for t in tasks}
+    unknown = (set(force) | set(only or ())) - set(by_name)
+    if unknown:
+        raise ValueError(f"Tareas desconocidas: {sorted(unknown)}")
+    state_dir = Path(state_dir)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    state_path = state_dir / "state.json"
+    state = json.loads(state_path.read_text()) if state_path.exists() else {}
+
+    selected = set(only) if only else set(by_name)
+    report = {name: {"status": "pendiente", "seconds": 0.0, "error": None} for name in selected}
+    pending = {name: {d for d in deps[name] if d in selected} for name in selected}
+    state_lock = threading.Lock()
+
+    def execute(task):
+        """(estado, segundos, error); nunca lanza para poder medir también las fallas."""
+        start = time.perf_counter()
+        try:
+            missing = [str(p) for p in task.inputs if not p.exists()]
+            if missing:
+                raise FileNotFoundError(f"Faltan entradas: {missing}")
+            fingerprint = huella(task)
+            previous = state.get(task.name, {})
+            if (not task.always and task.name not in force and previous.get("fingerprint") == fingerprint
+                    and all(p.exists() for p in task.outputs)):
+                return "omitida", time.perf_counter() - start, None
+            task.fn()
+            absent = [str(p) for p in task.outputs if not p.exists()]
+            if absent:
+                raise RuntimeError(f"No se escribieron las salidas: {absent}")
+        except Exception as e:
+            return "falló", time.perf_counter() - start, f"{type(e).__name__}: {e}"
+        with state_lock:
+            state[task.name] = {"fingerprint": fingerprint, "finished": datetime.now().isoformat()}
+            state_path.write_text(json.dumps(state, indent=2))
+        return "ok", time.perf_counter() - start, None
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+
+        def submit_ready():
+            for name in [n for n, waiting in pending.items() if not waiting]:
+                del pending[name]
+                running[pool.submit(execute, by_name[name])] = name
+
+        def block(name):
+            for other, waiting in list(pending.items()):
+                if name in waiting and other in pending:
+                    del pending[other]
+                    report[other]["status"] = "bloqueada"
+                    report[other]["error"] = f"depende de {name}"
+                    block(other)
+
+        submit_ready()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                status, seconds, error = future.result()
+                report[name].update(status=status, seconds=seconds, error=error)
+                if error:
+                    block(name)
+                else:
+                    for waiting in pending.values():
+                        waiting.discard(name)
+                log(f"   {report[name]['status']:>9} │ {name:<24} │ {report[name]['seconds']:7.2f} s"
+                    + (f" │ {report[name]['error']}" if report[name]["error"] else ""))
+            submit_ready()
+    wall = time.perf_counter() - wall_start
+
+    seconds = {name: info["seconds"] for name, info in report.items()}
+    critical, path = ruta_critica([t for t in tasks if t.name in selected],
+                                  {n: deps[n] & selected for n in selected}, seconds)
+    with open(state_dir / "runs.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"timestamp": datetime.now().isoformat(), "wall_seconds": round(wall, 3),
+                            "critical_path_seconds": round(critical, 3), "critical_path": path,
+                            "tasks": report}, ensure_ascii=False) + "\n")
+    log(f"\n⏱️  Total: {wall:.2f} s │ suma de tareas: {sum(seconds.values()):.2f} s │ "
+        f"ruta crítica: {critical:.2f} s ({' → '.join(path)})")
+    return report
+
+
+# ══════════════════════════════════════════════════════════════════
+# Stand-ins locales para correr sin red ni AWS
+# ══════════════════════════════════════════════════════════════════
+
+class CarpetaS3:
+    """Mismo `upload_file` que el cliente de boto3, copiando a `base/<bucket>/<key>`."""
+
+    def __init__(self, base):
+        self.base = Path(base)
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None):
+        target = self.base / Bucket / Key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(Filename, target)
+
+
+def crear_standins(base=OFFLINE_DIR, n_movies: int = 120, n_characters: int = 1400, seed: int = 42):
+    """
+    CSV tipo Kaggle y JSON de personajes tipo Disney API con datos sintéticos.
+    No sobreescribe archivos existentes (se pueden reemplazar por datos reales).
+    """
+    base = Path(base)
+    base.mkdir(parents=True, exist_ok=True)
+    kaggle_csv, api_json = base / "Case Study Data 2024.csv", base / "disney_characters_api.json"
+    rng = np.random.default_rng(seed)
+    titles = [f"Disney Movie {i}" for i in range(n_movies)]
+    if not kaggle_csv.exists():
+        revenue = rng.lognormal(19, 1, n_movies)
+        pd.DataFrame({
+            "Movie Title": titles,
+            "Release Date": pd.to_datetime(rng.integers(1937, 2025, n_movies).astype(str) + "-06-15").strftime("%Y-%m-%d"),
+            "Total Gross": [f"${v:,.0f}" if rng.random() > 0.05 else None for v in revenue],
+            "IMDB": np.round(rng.uniform(4, 9, n_movies), 1),
+        }).to_csv(kaggle_csv, index=False, encoding="latin-1")
+    if not api_json.exists():
+        characters = [{
+            "_id": i,
+            "name": f"Character {i}",
+            "films": [titles[j] for j in rng.choice(n_movies, rng.integers(0, 4), replace=False)],
+            "tvShows": [f"Show {j}" for j in rng.integers(0, 50, rng.integers(0, 3))],
+            "imageUrl": None,
+        } for i in range(n_characters)]
+        api_json.write_text(json.dumps({"data": characters}, ensure_ascii=False), encoding="utf-8")
+    return kaggle_csv, api_json
+
+
+# ══════════════════════════════════════════════════════════════════
+# Tareas del pipeline
+# ══════════════════════════════════════════════════════════════════
+
+def fetch_characters(url: str = API_URL, max_pages: int = MAX_PAGES, max_workers: int = 8) -> list:
+    """
+    Personajes de la Disney API con pixar_loader: la página 1 indica
+    `info.totalPages` y el resto se pide en paralelo (hasta `max_pages` si se da).
+    """
+    if LOADER_DIR not in sys.path:
+        sys.path.append(LOADER_DIR)
+    from pixar_loader import fetch_all_characters, make_session
+
+    return fetch_all_characters(make_session(max_workers), url=url, max_pages=max_pages, max_workers=max_workers)
+
+
+def s3_client_from_env():
+    """Cliente S3 con las credenciales del .env, como en los notebooks."""
+    import boto3
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    return boto3.Session(
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.getenv('AWS_DEFAULT_REGION')
+    ).client('s3')
+
+
+def construir_tareas(kaggle_csv, s3_client, bucket, api_fixture=None, engine=ENGINE, workdir=".") -> list:
+    """
+    Grafo de las tres fases. `api_fixture` (JSON con {"data": [...]}) reemplaza
+    a la Disney API; `s3_client` puede ser boto3 o CarpetaS3.
+    """
+    w = Path(workdir)
+    raw_movies = w / 'data/raw/kaggle/disney_movies.csv'
+    raw_chars_json = w / 'data/raw/api/disney_characters.json'
+    raw_chars_csv = w / 'data/raw/api/disney_characters.csv'
+    movies_pkl = w / 'data/cleaned/movies_cleaned.pkl'
+    chars_pkl = w / 'data/cleaned/characters_cleaned.pkl'
+    relations_pkl = w / 'data/cleaned/relations.pkl'
+    cleaned_csv = {name: w / f'data/cleaned/{name}.csv' for name in ('movies_cleaned', 'characters_cleaned', 'relations')}
+    parquet_dir, final_dir = w / 'spark_output', w / 'data/final'
+    enriched = parquet_dir / 'movies_enriched.parquet'
+    characters_index = parquet_dir / 'characters_index'
+    final_csv = {name: final_dir / f'{name}.csv' for name in ('movies_spark', 'agg_segment', 'agg_temporal', 'agg_decade')}
+
+    def upload(paths, prefix):
+        def fn():
+            for path in paths:
+                content_type = 'application/json' if path.suffix == '.json' else 'text/csv'
+                s3_client.upload_file(Filename=str(path), Bucket=bucket, Key=f"{prefix}/{path.name}",
+                                      ExtraArgs={'ServerSideEncryption': 'AES256', 'ContentType': content_type})
+        return fn
+
+    def ingesta_peliculas():
+        raw_movies.parent.mkdir(parents=True, exist_ok=True)
+        pd.read_csv(kaggle_csv, encoding='latin-1').to_csv(raw_movies, index=False, encoding='utf-8')
+
+    def ingesta_personajes():
+        if api_fixture:
+            characters = json.loads(Path(api_fixture).read_text(encoding='utf-8'))['data']
+        else:
+            characters = fetch_characters()
+        raw_chars_json.parent.mkdir(parents=True, exist_ok=True)
+        payload = {'metadata': {'total_characters': len(characters),
+                                'source': str(api_fixture) if api_fixture else 'Disney API',
+                                'url': API_URL},
+                   'data': characters}
+        raw_chars_json.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding='utf-8')
+        pd.DataFrame(characters).to_csv(raw_chars_csv, index=False, encoding='utf-8')
+
+    def save(df, table, pkl, csv):
+        # Nombres canónicos y tipos compactos del registro de esquemas
+        df = aplicar_esquema(df, table)
+        pkl.parent.mkdir(parents=True, exist_ok=True)
+        with open(pkl, 'wb') as f:
+            pickle.dump(df, f)
+        df.to_csv(csv, index=False, encoding='utf-8')
+
+    def load(pkl):
+        with open(pkl, 'rb') as f:
+            return pickle.load(f)
+
+    def limpiar_peliculas_task():
+        save(limpiar_peliculas(pd.read_csv(raw_movies)), "movies", movies_pkl, cleaned_csv['movies_cleaned'])
+
+    def limpiar_personajes_task():
+        data = json.loads(raw_chars_json.read_text(encoding='utf-8'))['data']
+        save(limpiar_personajes(pd.DataFrame(data)), "characters", chars_pkl, cleaned_csv['characters_cleaned'])
+
+    def relaciones_task():
+        save(crear_relaciones(load(chars_pkl)), "relations", relations_pkl, cleaned_csv['relations'])
+
+    def enriquecer_task():
+        movies, relations = load(movies_pkl), load(relations_pkl)
+        backend = elegir_backend(len(movies) + len(relations), engine)
+        try:
+            guardar_enriquecido(backend, enriquecer(backend, movies, relations), parquet_dir, final_dir)
+        finally:
+            backend.stop()
+
+    def indice_task():
+        construir_indice(load(chars_pkl), load(relations_pkl), characters_index)
+
+    def agregar_task():
+        # Lee el Parquet solo para decidir el backend por tamaño
+        import pyarrow.parquet as pq
+
+        backend = elegir_backend(pq.ParquetDataset(enriched).read(columns=[]).num_rows, engine)
+        try:
+            guardar_agregados(agregar(backend, backend.read_parquet(enriched)), parquet_dir, final_dir)
+        finally:
+            backend.stop()
+
+    source = {'url': API_URL, 'max_pages': MAX_PAGES}
+    return [
+        Task('ingesta_peliculas', ingesta_peliculas, [kaggle_csv], [raw_movies]),
+        Task('ingesta_personajes', ingesta_personajes, [api_fixture] if api_fixture else [],
+             [raw_chars_json, raw_chars_csv], params=source, always=not api_fixture),
+        Task('subir_raw_peliculas', upload([raw_movies], f"{S3_RAW_PREFIX}/kaggle"), [raw_movies],
+             params={'bucket': bucket}),
+        Task('subir_raw_personajes', upload([raw_chars_json, raw_chars_csv], f"{S3_RAW_PREFIX}/api"),
+             [raw_chars_json, raw_chars_csv], params={'bucket': bucket}),
+        Task('limpiar_peliculas', limpiar_peliculas_task, [raw_movies], [movies_pkl, cleaned_csv['movies_cleaned']]),
+        Task('limpiar_personajes', limpiar_personajes_task, [raw_chars_json],
+             [chars_pkl, cleaned_csv['characters_cleaned']]),
+        Task('relaciones', relaciones_task, [chars_pkl], [relations_pkl, cleaned_csv['relations']]),
+        Task('subir_limpios', upload(list(cleaned_csv.values()), S3_CLEANED_PREFIX), list(cleaned_csv.values()),
+             params={'bucket': bucket}),
+        Task('indice_personajes', indice_task, [chars_pkl, relations_pkl], [characters_index]),
+        Task('enriquecer', enriquecer_task, [movies_pkl, relations_pkl], [enriched, final_csv['movies_spark']],
+             params={'engine': engine}),
+        Task('agregar', agregar_task, [enriched],
+             [parquet_dir / f'{name}.parquet' for name in ('agg_segment', 'agg_temporal', 'agg_decade')]
+             + [final_csv[name] for name in ('agg_segment', 'agg_temporal', 'agg_decade')],
+             params={'engine': engine}),
+        Task('publicar_final', upload(list(final_csv.values()), S3_FINAL_PREFIX), list(final_csv.values()),
+             params={'bucket': bucket}),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--offline", action="store_true",
+                        help=f"usar stand-ins de {OFFLINE_DIR}/ (CSV, API y S3 locales)")
+    parser.add_argument("--kaggle-csv", default="Case Study Data 2024.csv")
+    parser.add_argument("--api-fixture", help="JSON con {'data': [...]} en lugar de la Disney API")
+    parser.add_argument("--engine", default=ENGINE, choices=["auto", "arrow", "spark"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--force", nargs="+", default=[], help="re-ejecutar estas tareas aunque no cambien")
+    parser.add_argument("--only", nargs="+", help="ejecutar solo estas tareas")
+    args = parser.parse_args()
+
+    if args.offline:
+        kaggle_csv, api_fixture = crear_standins()
+        kaggle_csv = args.kaggle_csv if os.path.exists(args.kaggle_csv) else kaggle_csv
+        api_fixture = args.api_fixture or api_fixture
+        s3_client, bucket = CarpetaS3(Path(OFFLINE_DIR) / "s3"), "local-bucket"
+    else:
+        kaggle_csv, api_fixture = args.kaggle_csv, args.api_fixture
+        s3_client, bucket = s3_client_from_env(), os.getenv('S3_BUCKET_NAME')
+
+    tasks = construir_tareas(kaggle_csv, s3_client, bucket, api_fixture, args.engine)
+    print(f"🚀 Pipeline Disney: {len(tasks)} tareas, {args.workers} workers\n")
+    report = run(tasks, args.workers, force=args.force, only=args.only)
+    memoria = reporte_memoria()
+    if not memoria.empty:
+        print("\n🗜️  Memoria por tabla (esquema compacto):")
+        print(memoria.to_string(index=False))
+    failed = [name for name, info in report.items() if info["status"] in ("falló", "bloqueada")]
+    if failed:
+        raise SystemExit(f"\n❌ Tareas sin completar: {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Backends de consulta para dashboard_disney.py.
+
+Ambos backends exponen la misma interfaz y devuelven solo los DataFrames
+pequeños que necesitan los gráficos:
+
+- DuckDBBackend: ejecuta SQL sobre los Parquet de `spark_output/`, empujando
+  los filtros del sidebar al scan (no materializa la tabla completa).
+- PandasBackend: el camino original sobre un DataFrame en memoria; se usa
+  como fallback cuando no hay DuckDB o no existen los Parquet.
+
+Los filtros son una lista de tuplas `(columna, operador, valor)` con
+operador `"between"` (valor = (min, max)) o `"="`.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from disney_figures import SCATTER_BINS, SCATTER_MAX_POINTS, SCATTER_UNKNOWN, bin_scatter
+
+PARQUET_PATH = os.getenv("DISNEY_PARQUET", "spark_output/movies_enriched.parquet")
+
+
+def parquet_mtime(parquet_path: str = PARQUET_PATH) -> float:
+    """Última escritura del Parquet (archivo o directorio de Spark); 0.0 si no existe."""
+    path = Path(parquet_path)
+    files = list(path.glob("*.parquet")) if path.is_dir() else [path]
+    return max((f.stat().st_mtime for f in files if f.exists()), default=0.0)
+
+
+def _quote(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+
+class PandasBackend:
+    name = "pandas"
+
+    def __init__(self, movies: pd.DataFrame):
+        self.movies = movies
+        self.columns = list(movies.columns)
+        # Versión de datos para las caches de figuras: momento de la carga
+        self.version = time.time()
+        # (filtros, DataFrame filtrado) del último pedido; una sola tupla para
+        # que lecturas concurrentes nunca mezclen llave y datos
+        self._cache = ((), movies)
+
+    def _filtered(self, filtros) -> pd.DataFrame:
+        key = tuple(filtros)
+        cached_key, cached_df = self._cache
+        if key == cached_key:
+            return cached_df
+        df = self.movies
+        for col, op, value in filtros:
+            if op == "between":
+                df = df[(df[col] >= value[0]) & (df[col] <= value[1])]
+            else:
+                df = df[df[col] == value]
+        self._cache = (key, df)
+        return df
+
+    def bounds(self, col):
+        return self.movies[col].min(), self.movies[col].max()
+
+    def distinct(self, col, filtros=()) -> list:
+        return sorted(self._filtered(filtros)[col].dropna().unique().tolist())
+
+    def count(self, filtros=()) -> int:
+        return len(self._filtered(filtros))
+
+    def aggregate(self, filtros, by, aggs: dict) -> pd.DataFrame:
+        """
+        `aggs` = {nombre_salida: (columna | None, "count" | "sum" | "mean")}.
+        Sin `by` devuelve una sola fila con los totales.
+        """
+        df = self._filtered(filtros)
+        out = {}
+        if by is None:
+            for name, (col, func) in aggs.items():
+                out[name] = [len(df) if col is None else getattr(df[col], func)()]
+            return pd.DataFrame(out)
+        grouped = df.groupby(by)
+        for name, (col, func) in aggs.items():
+            out[name] = grouped.size() if col is None else getattr(grouped[col], func)()
+        return pd.DataFrame(out).reset_index()
+
+    def top_n(self, filtros, order_col, n, cols) -> pd.DataFrame:
+        return self._filtered(filtros).nlargest(n, order_col)[cols]
+
+    def rows(self, filtros, cols) -> pd.DataFrame:
+        return self._filtered(filtros)[cols]
+
+    def scatter(self, filtros, x, y, color=None, size=None, hover=(),
+                max_points=SCATTER_MAX_POINTS, bins=SCATTER_BINS) -> pd.DataFrame:
+        """Puntos de un scatter x/y; con más de `max_points` filas, celdas de `bin_scatter`."""
+        cols = list(dict.fromkeys([x, y, *hover, *(c for c in (color, size) if c)]))
+        return bin_scatter(self._filtered(filtros)[cols], x, y, color=color, size=size,
+                           max_points=max_points, bins=bins)
+
+    def corr(self, filtros, a, b) -> float:
+        data = self._filtered(filtros)[[a, b]].dropna()
+        return data[a].corr(data[b]) if len(data) > 0 else float("nan")
+
+
+class DuckDBBackend:
+    name = "duckdb"
+
+    def __init__(self, parquet_path: str = PARQUET_PATH, completar: dict = None):
+        """`completar`: {columna: tipo SQL} que se agregan como NULL si el Parquet no las trae."""
+        import duckdb
+
+        path = Path(parquet_path)
+        # Spark escribe un directorio con archivos part-*.parquet
+        source = str(path / "*.parquet") if path.is_dir() else str(path)
+        # Versión de datos para las caches de figuras: última escritura del Parquet
+        self.version = parquet_mtime(parquet_path)
+        self.con = duckdb.connect()
+        scan = f"read_parquet('{source}')"
+        schema = self.con.execute(f"DESCRIBE SELECT * FROM {scan}").fetchall()
+        present = [row[0] for row in schema]
+        missing = {name: sql_type for name, sql_type in (completar or {}).items() if name not in present}
+        self.columns = present + list(missing)
+        # pandas ignora NaN en sumas/promedios; en SQL NaN es un valor, así que se pasa a NULL
+        select = ", ".join(
+            [f"CASE WHEN isnan({_quote(name)}) THEN NULL ELSE {_quote(name)} END AS {_quote(name)}"
+             if dtype in ("DOUBLE", "FLOAT") else _quote(name)
+             for name, dtype, *_ in schema]
+            + [f"CAST(NULL AS {sql_type}) AS {_quote(name)}" for name, sql_type in missing.items()]
+        )
+        self.con.execute(f"CREATE VIEW movies AS SELECT {select} FROM {scan}")
+        # Combinaciones de filtros materializadas como tablas (LRU) y las ya
+        # pedidas una vez (LRU más largo: solo guarda llaves)
+        self._tables = OrderedDict()
+        self._seen = OrderedDict()
+        self._counter = 0
+        self._lock = threading.Lock()
+        self.max_tables = 8
+        self.max_seen = 256
+
+    def _query(self, sql: str, params=()) -> pd.DataFrame:
+        # Un cursor por consulta: Streamlit atiende sesiones en hilos distintos
+        return self.con.cursor().execute(sql, list(params)).df()
+
+    @staticmethod
+    def _where(clauses, params=()):
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", list(params)
+
+    @staticmethod
+    def _filter_sql(filtros):
+        clauses, params = [], []
+        for col, op, value in filtros:
+            if op == "between":
+                clauses.append(f"{_quote(col)} BETWEEN ? AND ?")
+                params.extend(value)
+            else:
+                clauses.append(f"{_quote(col)} = ?")
+                params.append(value)
+        return clauses, params
+
+    def _source(self, filtros):
+        """
+        Devuelve (FROM, cláusulas, parámetros) para consultar las filas de `filtros`.
+        La primera consulta de una combinación empuja el filtro al scan del Parquet;
+        si la combinación se repite, se materializa como tabla y el resto de
+        consultas leen solo ese subconjunto.
+        """
+        key = tuple(filtros)
+        if not key:
+            return "movies", [], []
+        with self._lock:
+            name = self._tables.get(key)
+            if name is None and key in self._seen:
+                clauses, params = self._filter_sql(key)
+                where, params = self._where(clauses, params)
+                name = f"filtered_{self._counter}"
+                self._counter += 1
+                self.con.execute(f"CREATE TABLE {name} AS SELECT * FROM movies{where}", params)
+                self._tables[key] = name
+                if len(self._tables) > self.max_tables:
+                    _, old = self._tables.popitem(last=False)
+                    self.con.execute(f"DROP TABLE IF EXISTS {old}")
+            self._seen[key] = None
+            self._seen.move_to_end(key)
+            if len(self._seen) > self.max_seen:
+                self._seen.popitem(last=False)
+            if name is not None:
+                self._tables.move_to_end(key)
+                return name, [], []
+        clauses, params = self._filter_sql(key)
+        return "movies", clauses, params
+
+    def reset_cache(self):
+        """Borra las tablas filtradas y el registro de filtros vistos; la conexión sigue abierta."""
+        with self._lock:
+            for name in self._tables.values():
+                self.con.execute(f"DROP TABLE IF EXISTS {name}")
+            self._tables.clear()
+            self._seen.clear()
+
+    def close(self):
+        """Borra las tablas filtradas y cierra la conexión (el Parquet cambió)."""
+        self.reset_cache()
+        with self._lock:
+            self.con.close()
+
+    def bounds(self, col):
+        return tuple(self.con.cursor().execute(f"SELECT MIN({_quote(col)}), MAX({_quote(col)}) FROM movies").fetchone())
+
+    def _select(self, select, filtros, extra=(), tail="") -> str:
+        source, clauses, params = self._source(filtros)
+        where, params = self._where(clauses + list(extra), params)
+        return f"SELECT {select} FROM {source}{where}{tail}", params
+
+    def distinct(self, col, filtros=()) -> list:
+        sql, params = self._select(f"DISTINCT {_quote(col)} AS v", filtros, [f"{_quote(col)} IS NOT NULL"], " ORDER BY v")
+        return self._query(sql, params)["v"].tolist()
+
+    def count(self, filtros=()) -> int:
+        sql, params = self._select("COUNT(*)", filtros)
+        return int(self.con.cursor().execute(sql, params).fetchone()[0])
+
+    def aggregate(self, filtros, by, aggs: dict) -> pd.DataFrame:
+        exprs = []
+        for name, (col, func) in aggs.items():
+            if col is None:
+                exprs.append(f"COUNT(*) AS {_quote(name)}")
+            elif func == "sum":
+                # pandas devuelve 0 al sumar solo nulos
+                exprs.append(f"COALESCE(SUM({_quote(col)}), 0) AS {_quote(name)}")
+            elif func == "mean":
+                exprs.append(f"AVG({_quote(col)}) AS {_quote(name)}")
+            else:
+                exprs.append(f"COUNT({_quote(col)}) AS {_quote(name)}")
+        if by is None:
+            return self._query(*self._select(", ".join(exprs), filtros))
+        # Igual que groupby de pandas: sin grupo nulo y ordenado por la llave
+        sql, params = self._select(f"{_quote(by)}, {', '.join(exprs)}", filtros,
+                                   [f"{_quote(by)} IS NOT NULL"], " GROUP BY 1 ORDER BY 1")
+        return self._query(sql, params)
+
+    def top_n(self, filtros, order_col, n, cols) -> pd.DataFrame:
+        sql, params = self._select(", ".join(_quote(c) for c in cols), filtros, [f"{_quote(order_col)} IS NOT NULL"],
+                                   f" ORDER BY {_quote(order_col)} DESC LIMIT {int(n)}")
+        return self._query(sql, params)
+
+    def rows(self, filtros, cols) -> pd.DataFrame:
+        return self._query(*self._select(", ".join(_quote(c) for c in cols), filtros))
+
+    def scatter(self, filtros, x, y, color=None, size=None, hover=(),
+                max_points=SCATTER_MAX_POINTS, bins=SCATTER_BINS) -> pd.DataFrame:
+        """
+        Puntos de un scatter x/y. Con más de `max_points` filas agrupa en SQL en
+        una rejilla bins × bins (por color), como `bin_scatter`: solo se leen
+        las celdas ocupadas, con x/y/size promedio y `puntos`.
+        """
+        qx, qy = _quote(x), _quote(y)
+        not_null = [f"{qx} IS NOT NULL", f"{qy} IS NOT NULL"]
+        sql, params = self._select(f"COUNT(*), MIN({qx}), MAX({qx}), MIN({qy}), MAX({qy})", filtros, not_null)
+        n, x0, x1, y0, y1 = self.con.cursor().execute(sql, params).fetchone()
+        unknown = "'" + SCATTER_UNKNOWN.replace("'", "''") + "'"
+        color_expr = f"COALESCE(CAST({_quote(color)} AS VARCHAR), {unknown})" if color else None
+
+        if n <= max_points:
+            cols = [c for c in dict.fromkeys([x, y, *hover, size]) if c and c != color]
+            exprs = [_quote(c) for c in cols] + ([f"{color_expr} AS {_quote(color)}"] if color else [])
+            return self._query(*self._select(", ".join(exprs), filtros, not_null))
+
+        def cell(q, lo, hi):
+            # Igual que pd.cut con `bins` intervalos: el máximo cae en la última celda
+            width = (float(hi) - float(lo)) / bins or 1.0
+            return f"LEAST(FLOOR(({q} - {float(lo)!r}) / {width!r}), {bins - 1})"
+
+        exprs = [f"AVG({qx}) AS {qx}", f"AVG({qy}) AS {qy}", "COUNT(*) AS puntos"]
+        keys = [cell(qx, x0, x1), cell(qy, y0, y1)]
+        if color:
+            exprs.append(f"{color_expr} AS {_quote(color)}")
+            keys.append(color_expr)
+        if size and size not in (x, y):
+            exprs.append(f"AVG({_quote(size)}) AS {_quote(size)}")
+        sql, params = self._select(", ".join(exprs), filtros, not_null, f" GROUP BY {', '.join(keys)}")
+        return self._query(sql, params)
+
+    def corr(self, filtros, a, b) -> float:
+        sql, params = self._select(f"CORR({_quote(a)}, {_quote(b)})", filtros)
+        value = self.con.cursor().execute(sql, params).fetchone()[0]
+        return float("nan") if value is None else float(value)
@@ -0,0 +1,224 @@
+"""
+Registro de esquemas de las tablas del pipeline Disney.
+
+Cada tabla declara sus columnas canónicas con un tipo compacto:
+
+- "category" / lista de categorías: texto de baja cardinalidad (diccionario
+  en Parquet/Arrow); con lista, categorías fijas y ordenadas.
+- "Int8".."Int64": enteros nullable del ancho declarado (se ensancha solo si
+  los datos no caben).
+- "float32" / "float64", "str", "datetime".
+
+`aplicar_esquema` se llama al escribir cada etapa (limpieza, procesamiento)
+y al leer en el dashboard: renombra alias a su nombre canónico y convierte
+tipos. Con `completar=True` (lectura del dashboard) agrega además las
+columnas canónicas que falten, nulas. Las columnas que no están en
+el registro pasan sin cambios. Los valores fuera de una lista de categorías
+fijas quedan nulos, con un aviso y su conteo. `reporte_memoria` muestra la
+memoria de cada tabla antes y después.
+
+`tipo_spark` da el tipo equivalente para escribir con Spark sin pasar por pandas.
+"""
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+SEGMENTS = ['Éxito Crítico y Comercial', 'Éxito Crítico', 'Éxito Comercial', 'Bajo Rendimiento', 'Sin Clasificar']
+RATING_CATEGORIES = ['Bajo', 'Medio', 'Alto', 'Excelente']
+POPULARITY_CATEGORIES = ['Sin Apariciones', 'Baja', 'Media', 'Alta']
+
+SCHEMAS = {
+    "movies": {
+        "film_title": "str",
+        "brand": "category",
+        "box_office_revenue": "str",
+        "opening_revenue": "str",
+        "release_date": "datetime",
+        "opening_revenue_over_total_revenue": "Int8",
+        "imdb_score": "float64",
+        "rt_critics_score": "Int8",
+        "rt_audience_score": "Int8",
+        "release_year": "Int16",
+        "release_month": "Int8",
+        "release_quarter": "Int8",
+        "release_day_of_week": "category",
+        "box_office_revenue_clean": "float64",
+        "decade": "Int16",
+        "decade_label": "category",
+        "rating_category": RATING_CATEGORIES,
+        "segment": SEGMENTS,
+        "film_title_clean": "str",
+    },
+    "characters": {
+        "_id": "Int32",
+        "name": "str",
+        "num_films": "Int16",
+        "num_tv_shows": "Int16",
+        "total_appearances": "Int16",
+        "popularity_category": POPULARITY_CATEGORIES,
+    },
+    "relations": {
+        "character_name": "category",
+        "movie_title": "category",
+        "movie_title_clean": "category",
+    },
+    "agg_segment": {
+        "segment": SEGMENTS,
+        "num_movies": "Int32",
+        "total_revenue": "float64",
+        "avg_revenue": "float64",
+        "avg_characters": "float64",
+    },
+    "agg_temporal": {
+        "release_year": "Int16",
+        "num_movies": "Int32",
+        "avg_revenue": "float64",
+        "total_revenue": "float64",
+        "avg_characters": "float64",
+    },
+    "agg_decade": {
+        "decade_label": "category",
+        "num_movies": "Int32",
+        "avg_revenue": "float64",
+        "total_revenue": "float64",
+    },
+}
+
+# Salida de la Fase 3: películas + personajes distintos por película
+SCHEMAS["movies_enriched"] = {**SCHEMAS["movies"], "character_count": "Int32"}
+
+# Nombres alternativos que llegan de fuentes viejas o de otros datasets
+ALIASES = {
+    "movies": {
+        "film_title": ["title", "movie_title"],
+        "brand": ["studio", "franchise"],
+        "imdb_score": ["imdb_rating", "IMDB", "rating", "score"],
+        "release_year": ["year", "Year"],
+        "box_office_revenue_clean": ["revenue", "total_gross"],
+        "character_count": ["characters", "cast_count"],
+        "decade": ["period"],
+        "rating_category": ["rating_cat"],
+    },
+}
+ALIASES["movies_enriched"] = ALIASES["movies"]
+
+# Tipos de Spark SQL para escribir el mismo esquema desde un DataFrame de Spark
+SPARK_TYPES = {
+    "Int8": "tinyint", "Int16": "smallint", "Int32": "int", "Int64": "bigint",
+    "float32": "float", "float64": "double", "datetime": "timestamp",
+    "str": "string", "category": "string",
+}
+
+# {tabla: (bytes antes, bytes después, valores fuera de categoría)} de la última aplicación en el proceso
+_MEMORY = {}
+_lock = threading.Lock()
+
+
+def ancho_entero(dtype: str, lo=None, hi=None) -> str:
+    """El entero nullable más angosto, desde `dtype`, donde caben [lo, hi] (sin datos: `dtype`)."""
+    widths = ["Int8", "Int16", "Int32", "Int64"]
+    for candidate in widths[widths.index(dtype):]:
+        info = np.iinfo(candidate.lower())
+        if lo is None or (lo >= info.min and hi <= info.max):
+            return candidate
+    return "Int64"
+
+
+def tipo_spark(spec, lo=None, hi=None, fraccionario=False) -> str:
+    """Tipo de Spark SQL para `spec`; los enteros se ensanchan como en `aplicar_esquema`."""
+    if isinstance(spec, list):
+        return "string"
+    if spec.startswith("Int"):
+        return "double" if fraccionario else SPARK_TYPES[ancho_entero(spec, lo, hi)]
+    return SPARK_TYPES[spec]
+
+
+def _entero(s: pd.Series, dtype: str) -> pd.Series:
+    """Entero nullable de al menos `dtype`; se ensancha si los valores no caben."""
+    s = pd.to_numeric(s, errors="coerce")
+    valid = s.dropna()
+    if not valid.empty and not np.all(np.mod(valid, 1) == 0):
+        return s.astype("float64")
+    if valid.empty:
+        return s.astype(dtype)
+    return s.astype(ancho_entero(dtype, valid.min(), valid.max()))
+
+
+def _fuera_de_categoria(s: pd.Series, categories: list, table: str, col: str) -> int:
+    """Cuántos valores no nulos de `s` no están en `categories`; avisa con una muestra."""
+    unknown = s[s.notna() & ~s.isin(categories)]
+    if unknown.empty:
+        return 0
+    sample = ", ".join(repr(v) for v in unknown.unique()[:3])
+    warnings.warn(f"{table}.{col}: {len(unknown)} valores fuera de las categorías quedan nulos ({sample})",
+                  stacklevel=3)
+    return len(unknown)
+
+
+def _convertir(s: pd.Series, spec) -> pd.Series:
+    if isinstance(spec, list):
+        # Los valores fuera de la lista ya se contaron en aplicar_esquema; quedan nulos
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            return s.cat.set_categories(spec, ordered=True)
+        return pd.Categorical(s.where(s.isin(spec)), categories=spec, ordered=True)
+    if spec == "category":
+        return s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+    if spec.startswith("Int"):
+        return _entero(s, spec)
+    if spec.startswith("float"):
+        return pd.to_numeric(s, errors="coerce").astype(spec)
+    if spec == "datetime":
+        return pd.to_datetime(s, errors="coerce")
+    if spec == "str":
+        # Texto de alta cardinalidad (títulos, nombres): sin categorías, tal como llega
+        return s
+    raise ValueError(f"Tipo desconocido en el registro: {spec!r}")
+
+
+def aplicar_esquema(df: pd.DataFrame, table: str, completar: bool = False) -> pd.DataFrame:
+    """
+    DataFrame con nombres canónicos y tipos compactos de `table`; columnas
+    canónicas primero, en el orden del registro. Con `completar`, las
+    canónicas que falten se agregan nulas.
+    """
+    schema = SCHEMAS[table]
+    before = int(df.memory_usage(deep=True).sum())
+    renames = {}
+    for canonical, aliases in ALIASES.get(table, {}).items():
+        if canonical not in df.columns:
+            alias = next((a for a in aliases if a in df.columns and a not in renames), None)
+            if alias:
+                renames[alias] = canonical
+    df = df.rename(columns=renames)
+
+    out, unknown = {}, 0
+    for col, spec in schema.items():
+        if col in df.columns:
+            if isinstance(spec, list):
+                unknown += _fuera_de_categoria(df[col], spec, table, col)
+            out[col] = _convertir(df[col], spec)
+        elif completar:
+            out[col] = _convertir(pd.Series(None, index=df.index, dtype="str" if spec == "str" else "object"), spec)
+    for col in df.columns:
+        if col not in out:
+            out[col] = df[col]
+    df = pd.DataFrame(out, index=df.index)
+
+    with _lock:
+        _MEMORY[table] = (before, int(df.memory_usage(deep=True).sum()), unknown)
+    return df
+
+
+def reporte_memoria() -> pd.DataFrame:
+    """
+    Memoria por tabla antes/después de `aplicar_esquema` (última vez en el
+    proceso) y cuántos valores quedaron nulos por estar fuera de categoría.
+    """
+    with _lock:
+        rows = [(table, before / 1024, after / 1024, unknown)
+                for table, (before, after, unknown) in _MEMORY.items()]
+    report = pd.DataFrame(rows, columns=["Tabla", "KB antes", "KB después", "Fuera de categoría"])
+    report["Ahorro %"] = (1 - report["KB después"] / report["KB antes"].where(report["KB antes"] > 0)) * 100
+    return report.round(1)[["Tabla", "KB antes", "KB después", "Ahorro %", "Fuera de categoría"]]
@@ -0,0 +1,121 @@
+"""
+Arranque en frío de dashboard_disney.py.
+
+- `lazy_import`: plotly y boto3 se importan la primera vez que se usan (al
+  renderizar un gráfico o al ir a S3), no al cargar el script.
+- `IMPORT_TIMES` / `perfil_imports`: cuánto tardó cada import en este proceso.
+- `SnapshotSource`: el dataset de S3 se restaura primero desde un snapshot
+  local (primer render inmediato) y se refresca en un hilo en segundo plano.
+"""
+import importlib
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+SNAPSHOT_PATH = os.getenv("DISNEY_SNAPSHOT", ".cache/disney_movies.pkl")
+
+# {módulo: segundos} de la primera importación en el proceso
+IMPORT_TIMES = {}
+
+
+def registrar_import(label: str, start: float):
+    IMPORT_TIMES.setdefault(label, time.perf_counter() - start)
+
+
+class LazyModule:
+    """Importa `name` al primer acceso a un atributo y registra cuánto tardó."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            start = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            registrar_import(self._name, start)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def perfil_imports() -> pd.DataFrame:
+    """Perfil de imports del proceso, del más lento al más rápido."""
+    profile = pd.DataFrame({"Módulo": list(IMPORT_TIMES), "ms": [s * 1000 for s in IMPORT_TIMES.values()]})
+    return profile.sort_values("ms", ascending=False).round(1).reset_index(drop=True)
+
+
+_perfil_impreso = False
+
+
+def imprimir_perfil():
+    """Imprime el perfil de imports en stdout una vez por proceso (primer render)."""
+    global _perfil_impreso
+    if _perfil_impreso:
+        return
+    _perfil_impreso = True
+    print("Perfil de imports al arrancar:")
+    print(perfil_imports().to_string(index=False))
+
+
+def leer_snapshot(path: str = SNAPSHOT_PATH):
+    """(DataFrame, mtime) del último snapshot, o (None, None) si no hay uno legible."""
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f), os.path.getmtime(path)
+    except Exception:
+        return None, None
+
+
+def escribir_snapshot(df: pd.DataFrame, path: str = SNAPSHOT_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+class SnapshotSource:
+    """
+    `backend` queda disponible de inmediato con el último snapshot; un hilo
+    corre `fetch()` y, al terminar, guarda el snapshot nuevo y reemplaza el
+    backend. Sin snapshot previo, el constructor espera la primera carga.
+    """
+
+    def __init__(self, fetch, make_backend, path: str = SNAPSHOT_PATH):
+        self.fetch = fetch
+        self.make_backend = make_backend
+        self.path = path
+        self.backend = None
+        self.loaded_at = None
+        self.from_snapshot = False
+        self.error = None
+
+        df, mtime = leer_snapshot(path)
+        if df is not None:
+            self.backend = make_backend(df)
+            self.loaded_at = mtime
+            self.from_snapshot = True
+        self._thread = threading.Thread(target=self._refresh, name="disney-snapshot-refresh", daemon=True)
+        self._thread.start()
+        if self.backend is None:
+            self._thread.join()
+
+    def _refresh(self):
+        try:
+            df = self.fetch()
+            escribir_snapshot(df, self.path)
+            self.backend = self.make_backend(df)
+            self.loaded_at = time.time()
+            self.from_snapshot = False
+        except Exception as e:
+            self.error = e
+
+    @property
+    def refreshing(self) -> bool:
+        return self._thread.is_alive()
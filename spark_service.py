@@ -0,0 +1,268 @@
+"""
+Servicio Spark persistente (Spark Connect en localhost) para los notebooks.
+
+Un proceso de larga vida mantiene la JVM y el SparkContext; los notebooks
+(03b vía disney_processing.SparkBackend y Semana 2/nyc_yellow_cab_pyspark)
+se conectan como clientes con `obtener_sesion(perfil)`, así que una corrida
+repetida no paga el arranque de la JVM ni pierde lo cacheado:
+
+- PROFILES: configuración de SQL por tipo de trabajo (se aplica a la sesión
+  del cliente; la memoria del driver es del servidor, SERVER_CONF).
+- `tabla_cacheada`: tablas de uso frecuente (lookup de zonas, películas
+  enriquecidas) como vistas temporales globales cacheadas en el servidor,
+  compartidas por todas las sesiones y versionadas por huella de entrada.
+
+Si Spark Connect no está disponible, `obtener_sesion` cae a una SparkSession
+local con la misma configuración (el comportamiento anterior de los notebooks).
+
+Uso:
+    python spark_service.py start       # arranca el servidor en segundo plano
+    python spark_service.py status      # estado y tablas cacheadas
+    python spark_service.py stop
+"""
+import argparse
+import hashlib
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+SPARK_REMOTE = os.getenv("SPARK_REMOTE", "sc://localhost:15002")
+# Junto a este archivo, para que notebooks en otras carpetas usen el mismo pid/log
+SERVICE_DIR = Path(os.getenv("SPARK_SERVICE_DIR", Path(__file__).resolve().parent / ".spark_service"))
+START_TIMEOUT = int(os.getenv("SPARK_SERVICE_START_TIMEOUT", 120))
+CACHE_DB = "global_temp"
+
+# Configuración estática: se fija al arrancar la JVM (servidor o sesión local)
+SERVER_CONF = {
+    "spark.driver.memory": "4g",
+    "spark.executor.memory": "2g",
+}
+
+# Configuración de SQL por tipo de trabajo; se puede cambiar en cada sesión
+PROFILES = {
+    # Pocos miles de registros: pocas particiones de shuffle
+    "disney": {
+        "spark.sql.shuffle.partitions": "8",
+        "spark.sql.adaptive.enabled": "true",
+        "spark.sql.execution.arrow.pyspark.enabled": "true",
+    },
+    # Millones de viajes por mes
+    "nyc_taxi": {
+        "spark.sql.shuffle.partitions": "200",
+        "spark.sql.adaptive.enabled": "true",
+    },
+}
+
+APP_NAMES = {
+    "disney": "Disney Data Pipeline - Fase 3",
+    "nyc_taxi": "NYC Yellow Cab EDA",
+}
+
+
+def _host_port(remote: str = SPARK_REMOTE):
+    url = urlparse(remote)
+    return url.hostname or "localhost", url.port or 15002
+
+
+def servidor_activo(remote: str = SPARK_REMOTE) -> bool:
+    """True si hay algo escuchando en el puerto de Spark Connect."""
+    try:
+        with socket.create_connection(_host_port(remote), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+def _connect_packages() -> str:
+    """Spark < 4 no trae el servidor de Connect en sus jars; se baja con --packages."""
+    import pyspark
+
+    major = int(pyspark.__version__.split(".")[0])
+    if major >= 4:
+        return ""
+    return f"org.apache.spark:spark-connect_2.12:{pyspark.__version__}"
+
+
+def serve(remote: str = SPARK_REMOTE):
+    """Proceso del servidor: SparkContext con el plugin de Connect hasta recibir SIGTERM."""
+    from pyspark.sql import SparkSession
+
+    _, port = _host_port(remote)
+    builder = SparkSession.builder \
+        .appName("spark-service") \
+        .config("spark.plugins", "org.apache.spark.sql.connect.SparkConnectPlugin") \
+        .config("spark.connect.grpc.binding.port", str(port))
+    packages = _connect_packages()
+    if packages:
+        builder = builder.config("spark.jars.packages", packages)
+    for key, value in SERVER_CONF.items():
+        builder = builder.config(key, value)
+    spark = builder.getOrCreate()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    print(f"Spark {spark.version} escuchando en {remote}", flush=True)
+    stop.wait()
+    spark.stop()
+
+
+def iniciar_servidor(remote: str = SPARK_REMOTE, timeout: int = START_TIMEOUT) -> bool:
+    """
+    Lanza `serve` en segundo plano (sobrevive al notebook) y espera a que abra
+    el puerto. Si no arranca en `timeout` segundos se mata y se borra server.pid.
+    """
+    if servidor_activo(remote):
+        return True
+    SERVICE_DIR.mkdir(parents=True, exist_ok=True)
+    pid_file = SERVICE_DIR / "server.pid"
+    with open(SERVICE_DIR / "server.log", "ab") as log:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve", "--remote", remote],
+            stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True,
+        )
+    pid_file.write_text(str(proc.pid))
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if servidor_activo(remote):
+            return True
+        if proc.poll() is not None:
+            break
+        time.sleep(1)
+    _terminar(proc)
+    pid_file.unlink(missing_ok=True)
+    print(f"⚠️  El servidor Spark no arrancó; revisa {SERVICE_DIR / 'server.log'}")
+    return False
+
+
+def _terminar(proc: subprocess.Popen, wait: int = 10):
+    """Mata `proc` y su grupo (la JVM que lanzó), con SIGKILL si no sale con SIGTERM."""
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            break
+        try:
+            proc.wait(timeout=wait)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+    proc.wait()
+
+
+def detener_servidor():
+    pid_file = SERVICE_DIR / "server.pid"
+    if not pid_file.exists():
+        return False
+    try:
+        os.kill(int(pid_file.read_text()), signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    pid_file.unlink()
+    return True
+
+
+def _sesion_local(profile: str):
+    from pyspark.sql import SparkSession
+
+    builder = SparkSession.builder.appName(APP_NAMES.get(profile, profile))
+    for key, value in {**SERVER_CONF, **PROFILES[profile]}.items():
+        builder = builder.config(key, value)
+    return builder.getOrCreate()
+
+
+def obtener_sesion(profile: str, remote: str = SPARK_REMOTE, autostart: bool = True):
+    """
+    Sesión de Spark con el perfil `profile`: cliente de Spark Connect si el
+    servicio está (o se puede poner) arriba; si no, una sesión local.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil desconocido: {profile!r} (usa {', '.join(PROFILES)})")
+    try:
+        from pyspark.sql import SparkSession
+
+        if servidor_activo(remote) or (autostart and iniciar_servidor(remote)):
+            spark = SparkSession.builder.remote(remote).getOrCreate()
+            for key, value in PROFILES[profile].items():
+                spark.conf.set(key, value)
+            return spark
+    except ImportError as e:
+        # pyspark < 3.4 o sin las dependencias del cliente (grpcio, pyarrow)
+        print(f"⚠️  Spark Connect no disponible ({e}); usando sesión local")
+    return _sesion_local(profile)
+
+
+def es_remota(spark) -> bool:
+    """True si `spark` es un cliente de Spark Connect (cerrarla no apaga el servicio)."""
+    return type(spark).__module__.startswith("pyspark.sql.connect")
+
+
+def huella_version(files=(), **params) -> str:
+    """
+    Versión para `tabla_cacheada`: hash de los archivos de entrada (ruta,
+    tamaño, mtime) y de los parámetros con que se construye la tabla.
+    """
+    files = sorted(str(f) for f in files)
+    parts = [(f, os.path.getsize(f), os.path.getmtime(f)) for f in files]
+    return hashlib.sha1(repr((parts, sorted(params.items()))).encode()).hexdigest()[:16]
+
+
+def tabla_cacheada(spark, name: str, build, version: str = None):
+    """
+    `global_temp.<name>` cacheada en el servidor. `build()` solo corre si no
+    existe la versión pedida; las versiones anteriores se liberan.
+    """
+    view = name if version is None else f"{name}__{version}"
+    full_name = f"{CACHE_DB}.{view}"
+    if spark.catalog.tableExists(full_name):
+        return spark.table(full_name)
+    liberar_cache(spark, name)
+    build().createOrReplaceGlobalTempView(view)
+    spark.catalog.cacheTable(full_name)
+    return spark.table(full_name)
+
+
+def tablas_cacheadas(spark) -> list:
+    return [t.name for t in spark.catalog.listTables(CACHE_DB) if t.database == CACHE_DB]
+
+
+def liberar_cache(spark, name: str = None):
+    """Quita de la cache `name` (todas sus versiones) o, sin nombre, todas las tablas."""
+    for view in tablas_cacheadas(spark):
+        if name is None or view == name or view.startswith(f"{name}__"):
+            spark.catalog.uncacheTable(f"{CACHE_DB}.{view}")
+            spark.catalog.dropGlobalTempView(view)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["start", "stop", "status", "serve"])
+    parser.add_argument("--remote", default=SPARK_REMOTE)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.remote)
+    elif args.command == "start":
+        ok = iniciar_servidor(args.remote)
+        print(f"✅ Servicio Spark en {args.remote}" if ok else "❌ No se pudo iniciar el servicio")
+    elif args.command == "stop":
+        print("✅ Servicio detenido" if detener_servidor() else "ℹ️  No hay servicio registrado")
+    elif not servidor_activo(args.remote):
+        print(f"⚪ Sin servicio en {args.remote}")
+    else:
+        from pyspark.sql import SparkSession
+
+        spark = SparkSession.builder.remote(args.remote).getOrCreate()
+        print(f"🟢 Spark {spark.version} en {args.remote}")
+        for view in tablas_cacheadas(spark):
+            print(f"   - {CACHE_DB}.{view}")
+
+
+if __name__ == "__main__":
+    main()
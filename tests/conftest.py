@@ -0,0 +1,29 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Los módulos viven en la raíz y en "Semana 1" (sin paquete instalable)
+for path in (ROOT, os.path.join(ROOT, "Semana 1")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def cargar_funciones(script: str) -> dict:
+    """
+    Imports, constantes en MAYÚSCULAS y funciones/clases de un script de
+    Streamlit, sin ejecutar la interfaz (los scripts dibujan al importarse).
+    """
+    import ast
+
+    path = os.path.join(ROOT, script)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    keep = [
+        node for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef))
+        or (isinstance(node, ast.Assign) and all(isinstance(t, ast.Name) and t.id.isupper() for t in node.targets))
+    ]
+    namespace = {"__file__": path, "__name__": os.path.splitext(os.path.basename(path))[0]}
+    exec(compile(ast.Module(body=keep, type_ignores=[]), path, "exec"), namespace)
+    return namespace
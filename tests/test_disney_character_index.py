@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from disney_character_index import CharacterIndex, construir_indice, normalizar, personajes_sinteticos
+
+ACCENTED = ["Ángel", "ángela", "Anakin", "Émile", "Èric", "Eve", "Çelik", "Ñandú", "Núria", "Zoë", "Zoe", "Åsa"]
+
+
+def _fixture(rows=400, n_films=30):
+    chars, relations = personajes_sinteticos(rows, n_films=n_films, seed=7)
+    rng = np.random.default_rng(1)
+    extra = pd.DataFrame({"name": ACCENTED})
+    extra["num_films"] = rng.integers(0, 4, len(extra))
+    extra["num_tv_shows"] = rng.integers(0, 3, len(extra))
+    # Empates de apariciones a propósito: el desempate es alfabético
+    extra.loc[[0, 1, 9, 10], ["num_films", "num_tv_shows"]] = 2
+    extra["total_appearances"] = extra["num_films"] + extra["num_tv_shows"]
+    chars = pd.concat([chars, extra], ignore_index=True)
+    relations = pd.concat([relations, pd.DataFrame({"character_name": ACCENTED,
+                                                    "movie_title": "Film 0"})], ignore_index=True)
+    return chars, relations
+
+
+def _brute_force(chars, relations, prefix, film, k):
+    """Referencia: filtrar todo y ordenar por apariciones y llave normalizada."""
+    data = chars.assign(key=[normalizar(n) for n in chars["name"]], pos=np.arange(len(chars)))
+    data = data[data["key"].map(lambda key: key.startswith(normalizar(prefix)))]
+    if film:
+        data = data[data["name"].isin(relations.loc[relations["movie_title"] == film, "character_name"])]
+    data = data.sort_values(["total_appearances", "key", "pos"], ascending=[False, True, True], kind="stable")
+    return data["name"].head(k).tolist()
+
+
+@pytest.fixture(scope="module")
+def indexed(tmp_path_factory):
+    chars, relations = _fixture()
+    path = construir_indice(chars, relations, tmp_path_factory.mktemp("idx") / "characters_index")
+    return chars, relations, CharacterIndex(path)
+
+
+@pytest.mark.parametrize("k", [1, 10, 60])
+def test_prefijos_igual_que_fuerza_bruta(indexed, k):
+    chars, relations, index = indexed
+    prefixes = ["", "a", "á", "Án", "ange", "E", "é", "ÈR", "ç", "ñ", "nu", "zo", "zoë", "å", "Ka", "kami", "x"]
+    prefixes += [name[:n] for name in chars["name"].sample(40, random_state=0) for n in (1, 2, 3, 6)]
+    for prefix in prefixes:
+        assert index.autocompletar(prefix, k) == _brute_force(chars, relations, prefix, None, k), prefix
+
+
+def test_pelicula_y_prefijo_igual_que_fuerza_bruta(indexed):
+    chars, relations, index = indexed
+    for film in ["Film 0", "Film 3", "Film 29", "No existe"]:
+        for prefix in ["", "a", "án", "e", "z", "ka"]:
+            assert index.autocompletar(prefix, 10, film=film) == _brute_force(chars, relations, prefix, film, 10)
+
+
+def test_acentos_y_mayusculas_no_importan(indexed):
+    _, _, index = indexed
+    assert index.autocompletar("angel", 5) == index.autocompletar("ÁNGEL", 5)
+    assert {"Ángel", "ángela"} <= set(index.autocompletar("ange", 50))
+
+
+def test_reconstruir_reemplaza_el_indice(tmp_path):
+    chars, relations = _fixture(rows=50, n_films=5)
+    path = tmp_path / "characters_index"
+    construir_indice(chars, relations, path)
+    first = CharacterIndex(path)
+    construir_indice(chars.head(20), relations, path)
+
+    assert len(CharacterIndex(path)) == 20
+    # El índice abierto antes (mmap) sigue legible tras el intercambio
+    assert first.nombre(0) == chars["name"][0]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["characters_index"]
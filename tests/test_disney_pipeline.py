@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from disney_pipeline import CarpetaS3, Task, construir_tareas, crear_standins, dependencias, ruta_critica, run
+
+
+def _silencio(*_):
+    pass
+
+
+@pytest.fixture
+def offline(tmp_path):
+    kaggle_csv, api_fixture = crear_standins(tmp_path / "standins", n_movies=40, n_characters=200)
+    s3 = CarpetaS3(tmp_path / "s3")
+    tasks = construir_tareas(kaggle_csv, s3, "local-bucket", api_fixture, engine="arrow", workdir=tmp_path / "work")
+    return tmp_path, kaggle_csv, tasks
+
+
+def test_segunda_corrida_omite_lo_que_no_cambio(offline):
+    tmp_path, kaggle_csv, tasks = offline
+    state_dir = tmp_path / ".pipeline"
+
+    primera = run(tasks, state_dir=state_dir, log=_silencio)
+    assert {info["status"] for info in primera.values()} == {"ok"}
+    assert (tmp_path / "s3" / "local-bucket" / "disney-project/final/agg_segment.csv").exists()
+
+    segunda = run(tasks, state_dir=state_dir, log=_silencio)
+    assert {info["status"] for info in segunda.values()} == {"omitida"}
+
+    # Un cambio en el CSV de Kaggle re-ejecuta solo la rama de películas
+    kaggle_csv.write_text(kaggle_csv.read_text(encoding="latin-1") + "Otra,2001-06-15,$1,7.0\n", encoding="latin-1")
+    tercera = run(tasks, state_dir=state_dir, log=_silencio)
+    ejecutadas = {name for name, info in tercera.items() if info["status"] == "ok"}
+    assert {"ingesta_peliculas", "limpiar_peliculas", "enriquecer", "agregar"} <= ejecutadas
+    assert not ejecutadas & {"ingesta_personajes", "limpiar_personajes", "relaciones", "indice_personajes"}
+
+    runs = [json.loads(line) for line in (state_dir / "runs.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert len(runs) == 3
+    assert runs[1]["tasks"] == segunda
+    for registro in runs:
+        assert registro["critical_path"] and registro["critical_path_seconds"] <= registro["wall_seconds"] + 1e-3
+
+
+def _escribe(*paths):
+    def fn():
+        for path in paths:
+            path.write_text("x")
+    return fn
+
+
+def _falla():
+    raise RuntimeError("sin conexión")
+
+
+def test_falla_bloquea_solo_a_sus_dependientes(tmp_path):
+    a, b, c = tmp_path / "a", tmp_path / "b", tmp_path / "c"
+    tasks = [
+        Task("origen", _falla, [], [a]),
+        Task("medio", _escribe(b), [a], [b]),
+        Task("final", _escribe(c), [b], [c]),
+        Task("independiente", _escribe(tmp_path / "d"), [], [tmp_path / "d"]),
+    ]
+    report = run(tasks, state_dir=tmp_path / ".pipeline", log=_silencio)
+
+    assert report["origen"]["status"] == "falló" and "sin conexión" in report["origen"]["error"]
+    assert report["medio"]["status"] == report["final"]["status"] == "bloqueada"
+    assert report["final"]["error"] == "depende de medio"
+    assert report["independiente"]["status"] == "ok"
+
+    # La siguiente corrida retoma desde la tarea que falló
+    tasks[0].fn = _escribe(a)
+    report = run(tasks, state_dir=tmp_path / ".pipeline", log=_silencio)
+    assert {n: i["status"] for n, i in report.items()} == {
+        "origen": "ok", "medio": "ok", "final": "ok", "independiente": "omitida"}
+
+
+def test_ciclo_y_salidas_duplicadas(tmp_path):
+    x, y = tmp_path / "x", tmp_path / "y"
+    with pytest.raises(ValueError, match="Ciclo"):
+        dependencias([Task("a", _falla, [x], [y]), Task("b", _falla, [y], [x])])
+    with pytest.raises(ValueError, match="lo producen"):
+        dependencias([Task("a", _falla, [], [x]), Task("b", _falla, [], [x])])
+
+
+def test_ruta_critica_es_el_camino_mas_largo(tmp_path):
+    a, b, c, d = (tmp_path / n for n in "abcd")
+    tasks = [
+        Task("inicio", _falla, [], [a]),
+        Task("lenta", _falla, [a], [b]),
+        Task("rapida", _falla, [a], [c]),
+        Task("fin", _falla, [b, c], [d]),
+        Task("suelta", _falla, [], [tmp_path / "e"]),
+    ]
+    seconds = {"inicio": 1.0, "lenta": 5.0, "rapida": 2.0, "fin": 0.5, "suelta": 6.0}
+    assert ruta_critica(tasks, dependencias(tasks), seconds) == (6.5, ["inicio", "lenta", "fin"])
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from disney_processing import ArrowBackend, comparar, datos_sinteticos, procesar, round_half_up
+
+
+def test_round_half_up_como_spark():
+    values = pd.Series([1.005, 2.675, -1.005, 0.125, 2.5, np.nan])
+    assert round_half_up(values, 2).tolist()[:4] == [1.01, 2.68, -1.01, 0.13]
+    assert round_half_up(values, 0)[4] == 3.0
+    assert np.isnan(round_half_up(values, 2).iloc[-1])
+
+
+def test_constante_entera_es_int32_como_f_lit():
+    table = ArrowBackend().with_constant(pa.table({"a": [1, 2]}), "character_count", 0)
+    assert table.schema.field("character_count").type == pa.int32()
+
+
+def test_procesar_arrow_sin_relaciones():
+    movies, _ = datos_sinteticos(50)
+    resultados = procesar(ArrowBackend(), movies, None)
+    assert set(resultados["movies_enriched"]["character_count"].to_pylist()) == {0}
+    assert resultados["agg_segment"]["num_movies"].sum() == 50
+
+
+def test_procesar_arrow_valores_conocidos():
+    # Revenue en los bordes de HALF_UP (np.round daría 1.0 y 2.67) y un promedio
+    # de personajes de 0.25 (redondeo a par daría 0.2)
+    movies = pd.DataFrame({
+        "film_title_clean": ["a", "b", "c", "d", "e", "f"],
+        "segment": ["Éxito Crítico"] * 2 + ["Bajo Rendimiento"] * 4,
+        "release_year": [1995, 1995, 2003, 2003, 2010, 2010],
+        "decade_label": ["1990s", "1990s", "2000s", "2000s", "2010s", "2010s"],
+        "box_office_revenue_clean": [1.005, np.nan, 2.675, np.nan, np.nan, np.nan],
+    })
+    # Relación repetida (x en a) y una que apunta a un título inexistente
+    relations = pd.DataFrame({
+        "character_name": ["x", "y", "x", "z", "w", "q"],
+        "movie_title_clean": ["a", "a", "a", "b", "c", "zzz"],
+    })
+    resultados = procesar(ArrowBackend(), movies, relations)
+
+    assert resultados["movies_enriched"]["character_count"].to_pylist() == [2, 1, 1, 0, 0, 0]
+    esperados = {
+        "agg_segment": pd.DataFrame({
+            "segment": ["Bajo Rendimiento", "Éxito Crítico"],
+            "num_movies": [4, 2],
+            "total_revenue": [2.68, 1.01],
+            "avg_revenue": [2.68, 1.01],
+            "avg_characters": [0.3, 1.5],
+        }),
+        "agg_temporal": pd.DataFrame({
+            "release_year": [1995, 2003, 2010],
+            "num_movies": [2, 2, 2],
+            "avg_revenue": [1.01, 2.68, np.nan],
+            "total_revenue": [1.01, 2.68, np.nan],
+            "avg_characters": [1.5, 0.5, 0.0],
+        }),
+        "agg_decade": pd.DataFrame({
+            "decade_label": ["1990s", "2000s", "2010s"],
+            "num_movies": [2, 2, 2],
+            "avg_revenue": [1.01, 2.68, np.nan],
+            "total_revenue": [1.01, 2.68, np.nan],
+        }),
+    }
+    for name, esperado in esperados.items():
+        obtenido = resultados[name]
+        pd.testing.assert_frame_equal(obtenido, esperado, check_dtype=False, check_exact=True)
+        assert all(obtenido[c].dtype == "float64" for c in esperado.select_dtypes("float").columns)
+
+
+def test_comparar_arrow_y_spark(tmp_path):
+    pytest.importorskip("pyspark")
+    from spark_service import obtener_sesion
+
+    movies, relations = datos_sinteticos(300)
+    # Sesión local: la prueba no arranca el servicio de Spark Connect
+    spark = obtener_sesion("disney", autostart=False)
+    tiempos = comparar(movies, relations, out_dir=tmp_path, spark=spark)
+    assert set(tiempos) == {"arrow", "spark"}
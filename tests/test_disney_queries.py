@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from disney_figures import SCATTER_UNKNOWN
+from disney_queries import DuckDBBackend, PandasBackend, parquet_mtime
+
+
+def _movies(revenue):
+    return pd.DataFrame({
+        "film_title": ["A", "B", "C", "D"],
+        "brand": ["Pixar", "Pixar", "Marvel", "Disney"],
+        "release_year": [1995, 2003, 2012, 2019],
+        "box_office_revenue_clean": revenue,
+    })
+
+
+@pytest.fixture
+def parquet(tmp_path):
+    path = tmp_path / "movies.parquet"
+    _movies([1.0, 2.0, 3.0, float("nan")]).to_parquet(path)
+    return path
+
+
+def test_duckdb_coincide_con_pandas(parquet):
+    duck = DuckDBBackend(str(parquet))
+    pandas = PandasBackend(pd.read_parquet(parquet))
+    filtros = [("release_year", "between", (2000, 2020))]
+    aggs = {"n": (None, "count"), "total": ("box_office_revenue_clean", "sum")}
+
+    for _ in range(2):  # la segunda vez lee de la tabla materializada
+        got = duck.aggregate(filtros, "brand", aggs)
+        expected = pandas.aggregate(filtros, "brand", aggs)
+        pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+    assert duck.count(filtros) == pandas.count(filtros) == 3
+
+
+def test_duckdb_completa_columnas_faltantes(parquet):
+    duck = DuckDBBackend(str(parquet), {"segment": "VARCHAR", "brand": "VARCHAR"})
+    assert duck.columns[-1] == "segment" and duck.columns.count("brand") == 1
+    assert duck.distinct("segment") == []
+    assert duck.count([("brand", "=", "Pixar")]) == 2
+
+
+def test_parquet_reescrito_da_otra_version(parquet):
+    duck = DuckDBBackend(str(parquet))
+    filtros = [("brand", "=", "Pixar")]
+    duck.count(filtros)
+    duck.count(filtros)
+    assert duck._tables
+
+    _movies([10.0, 20.0, 30.0, 40.0]).to_parquet(parquet)
+    os.utime(parquet, (duck.version + 5, duck.version + 5))
+    assert parquet_mtime(str(parquet)) != duck.version
+
+    duck.close()
+    assert not duck._tables and not duck._seen
+    fresh = DuckDBBackend(str(parquet))
+    total = fresh.aggregate(filtros, None, {"total": ("box_office_revenue_clean", "sum")})["total"][0]
+    assert total == 30.0
+
+
+def test_reset_cache_conserva_la_conexion(parquet):
+    duck = DuckDBBackend(str(parquet))
+    filtros = [("brand", "=", "Pixar")]
+    duck.count(filtros)
+    duck.count(filtros)
+    tabla = next(iter(duck._tables.values()))
+
+    duck.reset_cache()
+    assert not duck._tables and not duck._seen
+    assert not duck.con.execute("SELECT * FROM duckdb_tables() WHERE table_name = ?", [tabla]).fetchall()
+    assert duck.count(filtros) == 2
+
+
+def test_combinaciones_vistas_acotadas(parquet):
+    duck = DuckDBBackend(str(parquet))
+    duck.max_seen = 4
+    for year in range(1990, 2000):
+        duck.count([("release_year", "between", (year, 2020))])
+    assert len(duck._seen) == 4
+    assert len(duck._tables) == 0
+
+
+@pytest.fixture
+def many_rows(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        "imdb_score": rng.uniform(1, 9, n).round(1),
+        "box_office_revenue_clean": rng.lognormal(18, 1, n),
+        "brand": rng.choice(["Pixar", "Marvel", None], n),
+        "character_count": rng.integers(0, 40, n),
+        "film_title": [f"T{i}" for i in range(n)],
+    })
+    path = tmp_path / "many.parquet"
+    df.to_parquet(path)
+    return df, path
+
+
+def test_scatter_agrupa_en_sql_igual_que_pandas(many_rows):
+    df, path = many_rows
+    args = dict(color="brand", size="character_count", hover=["film_title"], max_points=500, bins=20)
+    duck = DuckDBBackend(str(path)).scatter([], "imdb_score", "box_office_revenue_clean", **args)
+    pandas = PandasBackend(df).scatter([], "imdb_score", "box_office_revenue_clean", **args)
+
+    # Ninguna fila se pierde, tampoco las que no tienen marca
+    assert duck["puntos"].sum() == pandas["puntos"].sum() == len(df)
+    by_brand = lambda out: out.groupby(out["brand"].astype(str))["puntos"].sum().to_dict()
+    assert by_brand(duck) == by_brand(pandas)
+    assert by_brand(duck)[SCATTER_UNKNOWN] == df["brand"].isna().sum()
+    assert len(duck) <= 20 * 20 * 3
+
+
+def test_scatter_sin_agrupar_conserva_filas_sin_color(many_rows):
+    df, path = many_rows
+    out = DuckDBBackend(str(path)).scatter([], "imdb_score", "box_office_revenue_clean", color="brand",
+                                           hover=["film_title"], max_points=10_000)
+    assert len(out) == len(df) and "puntos" not in out.columns
+    assert (out["brand"] == SCATTER_UNKNOWN).sum() == df["brand"].isna().sum()
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from disney_schema import aplicar_esquema, reporte_memoria, tipo_spark
+
+
+def test_alias_y_tipos_compactos():
+    df = pd.DataFrame({"title": ["A", "B"], "imdb_rating": [7.5, 6.0], "release_year": [1995, 2019],
+                       "rt_critics_score": [90, 300], "extra": [1, 2]})
+    out = aplicar_esquema(df, "movies")
+
+    assert "film_title" in out and "imdb_score" in out and "extra" in out
+    assert out["imdb_score"].dtype == np.float64
+    assert out["release_year"].dtype == "Int16"
+    # 300 no cabe en Int8: se ensancha en lugar de desbordar
+    assert out["rt_critics_score"].dtype == "Int16"
+
+
+def test_columnas_faltantes_solo_con_completar():
+    df = pd.DataFrame({"film_title": ["A"], "release_year": [1995]})
+    assert aplicar_esquema(df, "movies_enriched").columns.tolist() == ["film_title", "release_year"]
+
+    out = aplicar_esquema(df, "movies_enriched", completar=True)
+    assert out.columns[:3].tolist() == ["film_title", "brand", "box_office_revenue"]
+    assert out["brand"].isna().all() and out["character_count"].dtype == "Int32"
+
+
+def test_valores_fuera_de_categoria_se_avisan_y_cuentan():
+    df = pd.DataFrame({"segment": ["Éxito Crítico", "Éxito Épico", None, "Otro"],
+                       "rating_category": pd.Categorical(["Alto", "Bajo", "Altísimo", None])})
+    with pytest.warns(UserWarning) as record:
+        out = aplicar_esquema(df, "movies")
+
+    messages = sorted(str(w.message) for w in record)
+    assert messages[0].startswith("movies.rating_category: 1 valores") and "'Altísimo'" in messages[0]
+    assert messages[1].startswith("movies.segment: 2 valores")
+
+    assert out["segment"].tolist()[0] == "Éxito Crítico"
+    assert out["segment"].isna().sum() == 3
+    assert out["rating_category"].isna().sum() == 2
+    report = reporte_memoria().set_index("Tabla")
+    assert report.loc["movies", "Fuera de categoría"] == 3
+
+
+def test_tipo_spark_ensancha_como_pandas():
+    assert tipo_spark("Int8", 0, 100) == "tinyint"
+    assert tipo_spark("Int8", 0, 300) == "smallint"
+    assert tipo_spark("Int16", 0, 1.5, fraccionario=True) == "double"
+    assert tipo_spark(["Bajo", "Alto"]) == "string"
+    assert tipo_spark("float32") == "float"
+
+
+def test_escritura_spark_con_esquema(tmp_path):
+    pytest.importorskip("pyspark")
+    from disney_processing import SparkBackend
+    from spark_service import obtener_sesion
+
+    backend = SparkBackend(obtener_sesion("disney", autostart=False))
+    try:
+        movies = pd.DataFrame({"film_title": ["A", "B"], "segment": ["Éxito Crítico", "Otro"],
+                               "release_year": [1995, 2019], "character_count": [3, 400]})
+        path = tmp_path / "movies_enriched.parquet"
+        backend.write_parquet(backend.from_pandas(movies), path, "movies_enriched")
+        written = pd.read_parquet(path)
+    finally:
+        backend.stop()
+
+    # Sin completar: solo las columnas que trae la tabla, en el orden del registro
+    assert written.columns.tolist() == ["film_title", "release_year", "segment", "character_count"]
+    assert written["segment"].isna().tolist() == [False, True]
+    assert written["release_year"].dtype == "int16"
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import cargar_funciones
+
+app = cargar_funciones("Semana 1/app.py")
+
+
+@pytest.mark.parametrize("df", [
+    pd.DataFrame({"a": [np.nan, 1.0], "b": [2.0, np.nan]}),  # ninguna fila completa
+    pd.DataFrame({"a": [np.nan, np.nan], "b": [1.0, 2.0]}),  # columna toda NaN
+    pd.DataFrame({"a": [], "b": []}, dtype="float64"),       # filtro sin filas
+])
+def test_density_grid_sin_filas_completas(df):
+    assert app["density_grid"](df, ("a", "b"), ("vacío", len(df))) == {"rows": 0}
+
+
+def test_density_grid_pares_espejo():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(500, 3)), columns=["a", "b", "c"])
+    grid = app["density_grid"](df, ("a", "b", "c"), ("normal", 500), bins=10)
+
+    assert grid["rows"] == 500
+    for i in range(3):
+        assert grid["diag"][i].sum() == 500
+        for j in range(3):
+            if i != j:
+                expected = np.histogram2d(df.iloc[:, j], df.iloc[:, i], bins=(grid["edges"][j], grid["edges"][i]))[0]
+                np.testing.assert_array_equal(grid["pairs"][(i, j)], expected)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import cargar_funciones
+
+app = cargar_funciones("Semana 1/pixar_app.py")
+build_relation, match_characters, count_titles = app["build_relation"], app["match_characters"], app["count_titles"]
+
+TITLES = ["Toy Story", "Toy Story 2", "Cars", "Up", "Coco", "Brave", "Ratatouille", "WALL-E", "Soul", "Luca"]
+
+
+def _listas(n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    return [list(rng.choice(TITLES, rng.integers(1, 4), replace=False)) for _ in range(n)]
+
+
+def _brute_force_mask(listas, seleccion):
+    return np.array([any(t in seleccion for t in titulos) for titulos in listas])
+
+
+def _brute_force_counts(listas, mask):
+    counts = {t: 0 for t in sorted({t for titulos in listas for t in titulos})}
+    for titulos, keep in zip(listas, mask):
+        if keep:
+            for t in titulos:
+                counts[t] += 1
+    return pd.Series(counts)
+
+
+def test_build_relation_ordena_titulos_y_conserva_aristas():
+    listas = _listas()
+    titulos, char_ids, codes = build_relation(listas)
+
+    assert list(titulos) == sorted(set(TITLES) & {t for l in listas for t in l})
+    edges = sorted(zip(char_ids.tolist(), titulos[codes].tolist()))
+    assert edges == sorted((i, t) for i, l in enumerate(listas) for t in l)
+
+
+@pytest.mark.parametrize("seleccion", [
+    TITLES, ["Cars"], ["Up", "Soul", "Coco"], TITLES[::2], [],
+])
+def test_match_y_conteo_igual_que_fuerza_bruta(seleccion):
+    listas = _listas()
+    titulos, char_ids, codes = build_relation(listas)
+    mask = match_characters(len(listas), titulos, char_ids, codes, seleccion)
+
+    np.testing.assert_array_equal(mask, _brute_force_mask(listas, seleccion))
+    pd.testing.assert_series_equal(count_titles(mask, titulos, char_ids, codes),
+                                   _brute_force_counts(listas, mask), check_dtype=False)
+
+
+def test_seleccion_vacia_no_devuelve_personajes():
+    listas = _listas(20)
+    titulos, char_ids, codes = build_relation(listas)
+    mask = match_characters(len(listas), titulos, char_ids, codes, [])
+
+    assert not mask.any()
+    assert count_titles(mask, titulos, char_ids, codes).sum() == 0
+
+
+def test_coincidencia_exacta_no_por_prefijo():
+    listas = [["Toy Story"], ["Toy Story 2"], ["Cars"]]
+    titulos, char_ids, codes = build_relation(listas)
+    assert match_characters(3, titulos, char_ids, codes, ["Toy Story"]).tolist() == [True, False, False]
+
+
+def test_titulo_ausente_no_marca_a_su_vecino():
+    listas = [["Cars"], ["Up"]]
+    titulos, char_ids, codes = build_relation(listas)
+    assert not match_characters(2, titulos, char_ids, codes, ["Coco", "Zootopia"]).any()
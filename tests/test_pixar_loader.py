@@ -0,0 +1,110 @@
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from PIL import Image
+
+from pixar_loader import ThumbnailCache, fetch_all_characters, make_session
+
+TOTAL_PAGES = 3
+
+
+def _png(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (600, 400), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        _Handler.hits[url.path] = _Handler.hits.get(url.path, 0) + 1
+        if url.path == "/character":
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            payload = {
+                "info": {"totalPages": TOTAL_PAGES},
+                "data": [{"_id": page * 10 + i, "name": f"P{page}-{i}"} for i in range(2)],
+            }
+            self._send(json.dumps(payload).encode("utf-8"), "application/json")
+        elif url.path.startswith("/img/"):
+            self._send(_png(url.path.rsplit("/", 1)[-1]), "image/png")
+        else:
+            self._send(b"not found", "text/plain", 404)
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_all_characters_recorre_todas_las_paginas(server):
+    characters = fetch_all_characters(make_session(4), url=f"{server}/character", max_workers=4)
+    assert [c["name"] for c in characters] == [f"P{p}-{i}" for p in range(1, TOTAL_PAGES + 1) for i in range(2)]
+
+
+def test_pipeline_usa_total_pages_de_la_api(server):
+    from disney_pipeline import fetch_characters
+
+    assert len(fetch_characters(url=f"{server}/character", max_pages=None)) == TOTAL_PAGES * 2
+    assert len(fetch_characters(url=f"{server}/character", max_pages=2)) == 4
+
+
+def test_get_descarga_una_vez_y_reduce(server, tmp_path):
+    cache = ThumbnailCache(directory=tmp_path, size=(64, 64))
+    url = f"{server}/img/red"
+    before = _Handler.hits.get("/img/red", 0)
+
+    first = cache.get(url)
+    second = cache.get(url)
+
+    assert first == second and Path(first).exists()
+    assert _Handler.hits["/img/red"] == before + 1
+    with Image.open(first) as image:
+        assert max(image.size) <= 64
+
+
+def test_get_no_desaloja_la_miniatura_que_devuelve(server, tmp_path):
+    # Cache de un byte: cualquier miniatura la excede, pero la recién escrita se conserva
+    cache = ThumbnailCache(directory=tmp_path, size=(64, 64), max_bytes=1)
+    paths = [cache.get(f"{server}/img/{color}") for color in ("blue", "green", "yellow")]
+
+    for path in paths:
+        assert path is not None
+    assert Path(paths[-1]).exists()
+    assert list(tmp_path.glob("*.jpg")) == [Path(paths[-1])]
+
+
+def test_prefetch_concurrente_devuelve_rutas_validas(server, tmp_path):
+    cache = ThumbnailCache(directory=tmp_path, size=(32, 32), max_bytes=10 ** 9)
+    urls = [f"{server}/img/{c}" for c in ("white", "black", "gray", "orange")] * 3
+    paths = cache.prefetch(urls, max_workers=8)
+
+    assert all(paths) and all(Path(p).exists() for p in paths)
+    assert len({*paths}) == 4
+
+
+def test_get_url_invalida_devuelve_none(server, tmp_path):
+    cache = ThumbnailCache(directory=tmp_path, session=make_session(1))
+    assert cache.get(f"{server}/no-existe") is None
+    assert cache.get(None) is None
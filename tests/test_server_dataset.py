@@ -0,0 +1,68 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import cargar_funciones
+
+app = cargar_funciones("Semana 2/dataset.py")
+
+
+def _registros(n=2000, seed=5):
+    rng = np.random.default_rng(seed)
+    inicio = pd.Timestamp("2024-03-01")
+    ts = inicio + pd.to_timedelta(rng.integers(0, 30 * 24 * 3600, n), unit="s")
+    df = pd.DataFrame({
+        "timestamp": ts.astype(str),
+        "server_id": rng.choice(["srv-1", "srv-2", "srv-3", "srv-4"], n),
+        "region": rng.choice(["us-east-1", "eu-west-1", "sa-east-1"], n),
+        "status": rng.choice(["OK", "WARN", "ERROR"], n, p=[0.7, 0.2, 0.1]),
+    })
+    # Mismo formato que devuelve `actualizar()`
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["fecha"] = df["timestamp"].dt.date
+    return df
+
+
+@pytest.fixture
+def store(monkeypatch):
+    raw = _registros()
+    monkeypatch.setitem(app, "actualizar", lambda: raw)
+    app["construir_store"].clear()
+    yield raw, app["construir_store"]()
+    app["construir_store"].clear()
+
+
+@pytest.mark.parametrize("inicio, fin, regiones", [
+    (dt.date(2024, 3, 1), dt.date(2024, 3, 30), None),
+    (dt.date(2024, 3, 5), dt.date(2024, 3, 5), ["eu-west-1"]),
+    (dt.date(2024, 3, 10), dt.date(2024, 3, 20), ["us-east-1", "sa-east-1"]),
+    (dt.date(2024, 2, 1), dt.date(2024, 2, 28), None),
+    (dt.date(2024, 3, 20), dt.date(2024, 3, 10), None),
+])
+def test_kpis_y_conteos_igual_que_filtro_pandas(store, inicio, fin, regiones):
+    raw, store = store
+    regiones = regiones or list(store["df"]["region"].cat.categories)
+
+    esperado = raw[(raw["fecha"] >= inicio) & (raw["fecha"] <= fin) & raw["region"].isin(regiones)]
+    buckets = store["buckets"].iloc[app["rango"](store["dias"], inicio, fin)]
+    buckets = buckets[buckets["region"].isin(regiones)]
+    registros = store["df"].iloc[app["rango"](store["ts"], inicio, fin)]
+    registros = registros[registros["region"].isin(regiones)]
+
+    assert int(buckets["count"].sum()) == len(esperado) == len(registros)
+    assert buckets["server_id"].nunique() == esperado["server_id"].nunique()
+    assert buckets["region"].nunique() == esperado["region"].nunique()
+
+    conteo = app["contar_status"](buckets).rename(index=str, columns=str).astype("int64")
+    referencia = esperado.groupby(["server_id", "status"]).size().unstack(fill_value=0)
+    assert set(conteo.index) == set(referencia.index) and set(conteo.columns) == set(referencia.columns)
+    pd.testing.assert_frame_equal(conteo, referencia.reindex_like(conteo).fillna(0).astype("int64"), check_names=False)
+
+def test_store_ordenado_con_tipos_compactos(store):
+    _, store = store
+    assert (np.diff(store["ts"]) >= np.timedelta64(0, "ns")).all()
+    assert (np.diff(store["dias"]) >= np.timedelta64(0, "ns")).all()
+    for col in ("server_id", "region", "status"):
+        assert isinstance(store["df"][col].dtype, pd.CategoricalDtype)
@@ -0,0 +1,66 @@
+import socket
+import subprocess
+
+import pytest
+
+import spark_service
+from spark_service import huella_version
+
+
+def test_huella_version_cambia_con_archivos_y_parametros(tmp_path):
+    data = tmp_path / "trips.parquet"
+    data.write_bytes(b"v1")
+    base = huella_version([data], distance_max=100)
+
+    assert huella_version([str(data)], distance_max=100) == base
+    assert huella_version([data], distance_max=50) != base
+    assert huella_version([data]) != base
+
+    data.write_bytes(b"v2 mas largo")
+    assert huella_version([data], distance_max=100) != base
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_iniciar_servidor_sin_arrancar_mata_el_proceso(tmp_path, monkeypatch):
+    monkeypatch.setattr(spark_service, "SERVICE_DIR", tmp_path)
+    procs = []
+    popen = subprocess.Popen
+
+    def sleeper(args, **kwargs):
+        # En lugar de `serve`: un proceso que nunca abre el puerto
+        procs.append(popen(["sleep", "60"], **kwargs))
+        return procs[-1]
+
+    monkeypatch.setattr(spark_service.subprocess, "Popen", sleeper)
+    assert not spark_service.iniciar_servidor(f"sc://127.0.0.1:{_puerto_libre()}", timeout=1)
+
+    assert procs[0].poll() is not None
+    assert not (tmp_path / "server.pid").exists()
+
+
+def test_tabla_cacheada_reconstruye_solo_con_version_nueva():
+    pytest.importorskip("pyspark")
+    from spark_service import liberar_cache, obtener_sesion, tabla_cacheada, tablas_cacheadas
+
+    # Sesión local: la prueba no arranca el servicio de Spark Connect
+    spark = obtener_sesion("disney", autostart=False)
+    builds = []
+
+    def build(n):
+        builds.append(n)
+        return spark.range(n)
+
+    try:
+        assert tabla_cacheada(spark, "smoke_test", lambda: build(3), version="a").count() == 3
+        assert tabla_cacheada(spark, "smoke_test", lambda: build(3), version="a").count() == 3
+        assert tabla_cacheada(spark, "smoke_test", lambda: build(5), version="b").count() == 5
+        assert builds == [3, 5]
+        assert [v for v in tablas_cacheadas(spark) if v.startswith("smoke_test")] == ["smoke_test__b"]
+    finally:
+        liberar_cache(spark, "smoke_test")
+        spark.stop()